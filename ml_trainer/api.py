@@ -1,12 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from run_credits_simple import create_schedule as simple_credits_create_schedule
-from run_semester_simple import create_schedule as simple_semester_create_schedule
+from schedule_backend import APPROACH_SOLVERS, CATALOG_FILES, create_backend, credit_caps
+from schedule_engine import ScheduleTimeout, apply_record, result_records
 from data_processor import ScheduleDataProcessor
+from schedule_cache import (
+    LRUCache, catalog_key, classes_key, params_key, pruned_key, reschedule_key, schedule_key, variant_key,
+)
+from response_encoder import ResponseEncoder, dumps, encode_object
+from catalog_store import CatalogStore
+from schedule_alternatives import ALTERNATIVES_MAX, cached_alternatives, schedule_alternatives
+from schedule_jobs import JobQueue, QueueFull
+import metrics
+from metrics import Preview, timed
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-import json
 
 app = Flask(__name__)
 # Update CORS configuration
@@ -24,12 +34,220 @@ CORS(app, resources={
     }
 })
 
-data_processor = ScheduleDataProcessor()
+data_processor = ScheduleDataProcessor(
+    max_analyses=int(os.environ.get('CATALOG_STORE_SIZE', 64)),
+    analysis_ttl_seconds=float(os.environ.get('CATALOG_TTL', 86400)),
+)
+
+# Where create_schedule work runs: a pool of warm worker processes by default
+# (SCHEDULER_BACKEND=inline runs it on the request thread)
+scheduler = create_backend()
+
+# Generated schedules keyed by a canonical hash of the classes and parameters
+schedule_cache = LRUCache(
+    max_entries=int(os.environ.get('SCHEDULE_CACHE_SIZE', 256)),
+    ttl_seconds=float(os.environ.get('SCHEDULE_CACHE_TTL', 900)),
+)
+
+# Registered catalogs, so schedule requests can send a catalogId instead of classes
+catalog_store = CatalogStore(
+    data_processor,
+    max_entries=int(os.environ.get('CATALOG_STORE_SIZE', 64)),
+    ttl_seconds=float(os.environ.get('CATALOG_TTL', 86400)),
+    files=CATALOG_FILES,
+)
+
+# Encoded course JSON per catalog, reused across responses
+response_encoder = ResponseEncoder(
+    max_catalogs=int(os.environ.get('CATALOG_STORE_SIZE', 64)),
+    ttl_seconds=float(os.environ.get('CATALOG_TTL', 86400)),
+)
+
+# Batch requests fan their items out over this pool
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 500))
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BATCH_WORKERS', min(8, os.cpu_count() or 1))),
+    thread_name_prefix="batch",
+)
+
+# Background schedule jobs (/jobs): bounded, deduplicated by schedule_key
+job_queue = JobQueue(
+    workers=int(os.environ.get('JOB_WORKERS', 4)),
+    max_pending=int(os.environ.get('JOB_QUEUE_SIZE', 64)),
+    ttl_seconds=float(os.environ.get('JOB_TTL', 600)),
+)
+
+# Streaming responses (?stream= or Accept): newline-delimited JSON or server-sent events
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+# Longest payload excerpt written to the request log
+LOG_PAYLOAD_CHARS = int(os.environ.get('LOG_PAYLOAD_CHARS', 2000))
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def timeout_error():
+    return {
+        "error": f"Schedule generation timed out after {scheduler.deadline_seconds:g}s",
+        "metadata": {
+            "success": False,
+            "timestamp": str(datetime.now())
+        }
+    }
+
+def prepare_schedule(data, reschedule=False):
+    """Process a /generate-schedule (or, with reschedule, /reschedule) payload.
+
+    Returns ((processed_data, catalog_id, graph), 200) or (error, http_status).
+    """
+    # Process raw data into scheduler-friendly format; a registered
+    # catalog only needs its preferences processed
+    catalog_id = data.get("catalogId") if isinstance(data, dict) else None
+    catalog = None
+    if catalog_id:
+        catalog = catalog_store.get(catalog_id)
+        if catalog is None:
+            logger.error(f"Unknown catalog {catalog_id}")
+            return {"error": f"Unknown catalogId '{catalog_id}'; upload the classes to /catalogs first"}, 404
+        processed_data = data_processor.process_with_catalog(data, catalog.classes)
+    else:
+        processed_data = data_processor.process_payload(data)
+    # Check if processing was successful before accessing classes
+    if "error" in processed_data:
+        logger.error(f"Data processing failed: {processed_data['error']}")
+        return processed_data, 400
+    if reschedule:
+        approach = processed_data["parameters"].get("approach")
+        if approach in APPROACH_SOLVERS:
+            return {"error": f"Rescheduling isn't supported for approach '{approach}'"}, 400
+        processed_data = data_processor.process_reschedule(data, processed_data)
+        if "error" in processed_data:
+            logger.error(f"Reschedule processing failed: {processed_data['error']}")
+            return processed_data, 400
+    logger.info(f"Processed data complete with {len(processed_data['classes'])} courses")
+    catalog_id = catalog.catalog_id if catalog else classes_key(data)
+    graph = catalog.graph if catalog else None
+    if pruned_key(catalog_id, data) != catalog_id:
+        # Classes narrowed by "required"/"completed" compile as their own catalog
+        catalog_id = pruned_key(catalog_id, data)
+        graph = None
+    # Fail fast on classes no schedule could place
+    problem = data_processor.diagnose(processed_data, credit_caps(processed_data["parameters"]).largest(), catalog_id)
+    if problem:
+        return problem, 422
+    return (processed_data, catalog_id, graph), 200
+
+def build_schedule(data, cache_key=None, progress=None, reschedule=False):
+    """Process a payload (see prepare_schedule) and run the scheduler.
+
+    Returns (result, http_status); successful results are cached under cache_key.
+    """
+    prepared, status = prepare_schedule(data, reschedule)
+    if status != 200:
+        return prepared, status
+    processed_data, catalog_id, graph = prepared
+
+    try:
+        schedule_result = scheduler.run(catalog_id, processed_data, graph, progress)
+    except ScheduleTimeout:
+        logger.error("Schedule generation timed out")
+        return timeout_error(), 504
+
+    # Log the result
+    logger.info(f"Schedule generation complete with {len(schedule_result.get('schedule', []))} semesters")
+    logger.info(f"Schedule metadata: {schedule_result.get('metadata', {})}")
+
+    # Check if schedule generation was successful
+    if "error" in schedule_result:
+        logger.error(f"Schedule generation failed: {schedule_result['error']}")
+        return schedule_result, 500
+
+    if cache_key:
+        schedule_cache.put(cache_key, schedule_result)
+    return schedule_result, 200
+
+def schedule_response(schedule_result, catalog_id=None, **extra):
+    """A {"metadata", "schedule", **extra, "timestamp"} JSON response.
+
+    Assembled from the catalog's cached course fragments; ?shape=compact lists
+    class ids per semester plus a one-time "classes" table instead.
+    """
+    with timed("serialize"):
+        body = response_encoder.encode(
+            schedule_result,
+            catalog_id,
+            compact=request.args.get("shape") == "compact",
+            extra={**extra, "timestamp": str(datetime.now())},
+        )
+    return Response(body + "\n", mimetype="application/json")
+
+def stream_format():
+    """The streaming format a request asked for, if any.
+
+    Either ?stream=ndjson|sse or an Accept header naming one of their media types.
+    """
+    fmt = request.args.get("stream")
+    if fmt in STREAM_FORMATS:
+        return fmt
+    accepted = set(request.accept_mimetypes.values())
+    for fmt, mimetype in STREAM_FORMATS.items():
+        if mimetype in accepted:
+            return fmt
+    return None
+
+def encode_record(record, fmt):
+    body = json.dumps(record, separators=(",", ":"), default=str)
+    if fmt == "sse":
+        return f"event: {record['type']}\ndata: {body}\n\n"
+    return body + "\n"
+
+def stream_schedule(data, cache_key, fmt, reschedule=False):
+    """Respond with one record per semester as it is scheduled, metadata last.
+
+    Records are those of Planner.stream: "semester", then "amend"/"truncate"
+    if the finishing rules changed a semester already sent, then "metadata"
+    (with "cached" and "timestamp" added). A failure after the response has
+    started arrives as an "error" record.
+    """
+    schedule_result = schedule_cache.get(cache_key) if cache_key else None
+    cached = schedule_result is not None
+    if cached:
+        logger.info("Streaming schedule from cache")
+        records = result_records(schedule_result)
+    else:
+        prepared, status = prepare_schedule(data, reschedule)
+        if status != 200:
+            return jsonify(prepared), status
+        processed_data, catalog_id, graph = prepared
+        records = scheduler.stream(catalog_id, processed_data, graph)
+
+    def generate():
+        result = {"metadata": {}, "schedule": []}
+        try:
+            for record in records:
+                apply_record(result, record)
+                if record["type"] == "metadata":
+                    record = {**record, "cached": cached, "timestamp": str(datetime.now())}
+                yield encode_record(record, fmt)
+        except ScheduleTimeout:
+            logger.error("Streamed schedule generation timed out")
+            yield encode_record({"type": "error", **timeout_error()}, fmt)
+            return
+        except Exception as e:
+            logger.exception("Error streaming schedule:")
+            yield encode_record({"type": "error", "error": str(e)}, fmt)
+            return
+        logger.info(f"Streamed schedule complete with {len(result['schedule'])} semesters")
+        if cache_key and not cached:
+            schedule_cache.put(cache_key, result)
+
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt],
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Add health check endpoint
 @app.route('/', methods=['GET'])
 def health_check():
@@ -59,48 +277,261 @@ def generate_schedule():
         
     try:
         logger.info("=== Schedule Generation Request ===")
-        data = request.json
-        logger.info(f"Incoming payload: {json.dumps(data, indent=2)}")
+        with timed("parse"):
+            data = request.json
+        logger.info("Incoming payload: %s", Preview(data, LOG_PAYLOAD_CHARS))
 
-        # Process raw data into scheduler-friendly format
-        processor = ScheduleDataProcessor()
-        processed_data = processor.process_payload(data)
-        # Check if processing was successful before accessing classes
-        if "error" in processed_data:
-            logger.error(f"Data processing failed: {processed_data['error']}")
-            return jsonify(processed_data), 400
-        logger.info(f"Processed data complete with {len(processed_data['classes'])} courses")
-
-        # Determine which optimizer to use based on approach
-        approach = (processed_data.get("parameters") or {}).get("approach", "credits-based")
-        logger.info(f"Using scheduling approach: {approach}")
-
-        # Support both spellings: 'semester-based' (preferred) and 'semesters-based' (legacy)
-        if approach in ("semester-based", "semesters-based"):
-            logger.info("Using simple semester-based scheduler")
-            schedule_result = simple_semester_create_schedule(processed_data)
-        else:
-            # Use the simplified credits-based scheduler we built
-            logger.info("Using simple credits-based scheduler")
-            schedule_result = simple_credits_create_schedule(processed_data)
+        # Identical classes + parameters produce identical schedules
+        catalog_id = catalog_key(data) if isinstance(data, dict) else None
+        cache_key = schedule_key(data, catalog_id) if catalog_id else None
+        fmt = stream_format()
+        if fmt:
+            return stream_schedule(data, cache_key, fmt)
+        schedule_result = schedule_cache.get(cache_key) if cache_key else None
+        if schedule_result is not None:
+            logger.info("Serving schedule from cache")
+            return schedule_response(schedule_result, catalog_id, cached=True)
 
-        # Log the result
-        logger.info(f"Schedule generation complete with {len(schedule_result.get('schedule', []))} semesters")
-        logger.info(f"Schedule metadata: {schedule_result.get('metadata', {})}")
+        schedule_result, status = build_schedule(data, cache_key)
+        if status != 200:
+            return jsonify(schedule_result), status
 
-        # Check if schedule generation was successful
-        if "error" in schedule_result:
-            logger.error(f"Schedule generation failed: {schedule_result['error']}")
-            return jsonify(schedule_result), 500
+        return schedule_response(schedule_result, catalog_id, cached=False)
 
+    except Exception as e:
+        logger.exception("Error generating schedule:")
         return jsonify({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
+
+@app.route('/reschedule', methods=['POST', 'OPTIONS'])
+def reschedule():
+    """Regenerate a plan after its locked semesters.
+
+    Body: a /generate-schedule payload (classes or catalogId, and the current
+    preferences) plus "schedule" (the earlier plan's schedule list),
+    "lockedSemesters" (completed or locked terms, e.g. "Fall 2025") and
+    optionally "dropped" (class ids no longer wanted). Semesters up to the
+    last locked one come back unchanged; only the ones after it are scheduled.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        logger.info("=== Reschedule Request ===")
+        with timed("parse"):
+            data = request.json
+        logger.info("Incoming payload: %s", Preview(data, LOG_PAYLOAD_CHARS))
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid payload structure"}), 400
+
+        catalog_id = catalog_key(data)
+        cache_key = reschedule_key(data, catalog_id)
+        fmt = stream_format()
+        if fmt:
+            return stream_schedule(data, cache_key, fmt, reschedule=True)
+        schedule_result = schedule_cache.get(cache_key)
+        cached = schedule_result is not None
+        if cached:
+            logger.info("Serving reschedule from cache")
+        else:
+            schedule_result, status = build_schedule(data, cache_key, reschedule=True)
+            if status != 200:
+                return jsonify(schedule_result), status
+
+        return schedule_response(schedule_result, catalog_id, cached=cached)
+
+    except Exception as e:
+        logger.exception("Error rescheduling:")
+        return jsonify({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
+
+def _batch_item(catalog, item):
+    """Schedule one batch item against an already-compiled catalog"""
+    if not isinstance(item, dict):
+        return {"status": "error", "error": "Invalid item: expected an object with 'preferences'"}
+    result = {"id": item["id"]} if "id" in item else {}
+    try:
+        # Items with "required"/"completed" schedule against their own narrowed catalog
+        catalog_id = pruned_key(catalog.catalog_id, item)
+        graph = catalog.graph if catalog_id == catalog.catalog_id else None
+        cache_key = catalog_id + ":" + params_key(item.get("preferences"))
+        schedule_result = schedule_cache.get(cache_key)
+        cached = schedule_result is not None
+        if not cached:
+            processed_data = data_processor.process_with_catalog(item, catalog.classes)
+            if "error" in processed_data:
+                return {**result, "status": "error", "error": processed_data["error"]}
+            problem = data_processor.diagnose(processed_data, credit_caps(processed_data["parameters"]).largest(),
+                                              catalog_id)
+            if problem:
+                return {**result, "status": "error", **problem}
+            schedule_result = scheduler.run(catalog_id, processed_data, graph)
+            if "error" in schedule_result:
+                return {**result, "status": "error", "error": schedule_result["error"]}
+            schedule_cache.put(cache_key, schedule_result)
+        return {
+            **result,
+            "status": "success",
+            "cached": cached,
             "metadata": schedule_result.get('metadata', {}),
             "schedule": schedule_result.get('schedule', []),
-            "timestamp": str(datetime.now())
-        })
-        
+        }
+    except ScheduleTimeout:
+        return {**result, "status": "error", "error": "Schedule generation timed out"}
     except Exception as e:
-        logger.exception("Error generating schedule:")
+        logger.exception("Error generating batch item:")
+        return {**result, "status": "error", "error": str(e)}
+
+@app.route('/generate-schedules', methods=['POST', 'OPTIONS'])
+def generate_schedules():
+    """Generate schedules for many preference sets against one catalog.
+
+    Body: {"classes"|"courseData"|"catalogId": ..., "items": [{"id"?, "preferences"}, ...]}.
+    Results come back in input order, one per item, errors included;
+    ?shape=compact gives each one the compact shape (see schedule_response).
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        logger.info("=== Batch Schedule Generation Request ===")
+        with timed("parse"):
+            data = request.json
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid payload structure"}), 400
+        items = data.get("items")
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Invalid payload structure: expected a non-empty 'items' list"}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Too many items: {len(items)} (max {BATCH_MAX_ITEMS})"}), 413
+
+        # Normalize and compile the shared classes once for every item
+        has_classes = isinstance(data.get("classes"), list) or isinstance(data.get("courseData"), list)
+        catalog_id = data.get("catalogId")
+        if catalog_id and not has_classes:
+            catalog = catalog_store.get(catalog_id)
+            if catalog is None:
+                return jsonify({"error": f"Unknown catalogId '{catalog_id}'; upload the classes to /catalogs first"}), 404
+        else:
+            catalog, error, _ = catalog_store.register(data)
+            if error:
+                logger.error(f"Data processing failed: {error}")
+                return jsonify({"error": error}), 400
+        logger.info(f"Batch of {len(items)} items against catalog {catalog.catalog_id} ({len(catalog.classes)} classes)")
+
+        results = list(batch_executor.map(lambda item: _batch_item(catalog, item), items))
+        failed = sum(1 for r in results if r.get("status") != "success")
+        compact = request.args.get("shape") == "compact"
+        with timed("serialize"):
+            encoded = []
+            for item, r in zip(items, results):
+                if r.get("status") == "success":
+                    extra = {k: v for k, v in r.items() if k not in ("metadata", "schedule")}
+                    encoded.append(response_encoder.encode(r, pruned_key(catalog.catalog_id, item), compact, extra))
+                else:
+                    encoded.append(dumps(r))
+            body = encode_object({
+                "catalogId": dumps(catalog.catalog_id),
+                "results": "[" + ",".join(encoded) + "]",
+                "succeeded": dumps(len(results) - failed),
+                "failed": dumps(failed),
+                "timestamp": dumps(str(datetime.now())),
+            })
+        return Response(body + "\n", mimetype="application/json")
+    except Exception as e:
+        logger.exception("Error generating batch schedules:")
+        return jsonify({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
+
+@app.route('/generate-alternatives', methods=['POST', 'OPTIONS'])
+def generate_alternatives():
+    """Several distinct schedules for one payload, best first.
+
+    Body: a /generate-schedule payload plus "alternatives" (how many, default
+    3, max ALTERNATIVES_MAX). Each candidate is the schedule under a perturbed
+    priority order (variant 0 is the ordinary one); candidates run in parallel
+    and are ranked by semesters to graduate, then by credit spread. Identical
+    placements count once, so fewer may come back than were asked for.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        logger.info("=== Alternative Schedules Request ===")
+        with timed("parse"):
+            data = request.json
+        logger.info("Incoming payload: %s", Preview(data, LOG_PAYLOAD_CHARS))
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid payload structure"}), 400
+        count = data.get("alternatives", 3)
+        if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= ALTERNATIVES_MAX:
+            return jsonify({"error": f"'alternatives' must be an integer from 1 to {ALTERNATIVES_MAX}"}), 400
+
+        catalog_id = catalog_key(data)
+        cache_key = schedule_key(data, catalog_id)
+
+        def cached(variant):
+            result = schedule_cache.get(variant_key(cache_key, variant))
+            # Variant 0 shares /generate-schedule's entry, which solver approaches also fill
+            if result is None or result.get("metadata", {}).get("approach") in APPROACH_SOLVERS:
+                return None
+            return result
+
+        # Every variant already scheduled: skip processing, as /generate-schedule does
+        answer = cached_alternatives(count, cached)
+        if answer is not None:
+            logger.info("Serving alternative schedules from cache")
+            return alternatives_response(*answer, count, catalog_id)
+
+        prepared, status = prepare_schedule(data)
+        if status != 200:
+            return jsonify(prepared), status
+        processed_data, scheduler_catalog, graph = prepared
+        approach = processed_data["parameters"].get("approach")
+        if approach in APPROACH_SOLVERS:
+            return jsonify({"error": f"Alternatives aren't supported for approach '{approach}'"}), 400
+
+        timeouts = []
+
+        def run(processed):
+            key = variant_key(cache_key, processed["parameters"].get("variant", 0))
+            result = schedule_cache.get(key)
+            if result is None:
+                try:
+                    result = scheduler.run(scheduler_catalog, processed, graph)
+                except ScheduleTimeout:
+                    timeouts.append(key)
+                    return None
+                if "error" in result:
+                    logger.error(f"Alternative schedule failed: {result['error']}")
+                    return None
+                schedule_cache.put(key, result)
+            return result
+
+        picked, candidates = schedule_alternatives(processed_data, count, run, batch_executor.map)
+        logger.info(f"Kept {len(picked)} of {candidates} alternative schedules")
+        if not picked:
+            if timeouts:
+                return jsonify(timeout_error()), 504
+            return jsonify({"error": "No schedule could be generated"}), 500
+        return alternatives_response(picked, candidates, count, catalog_id)
+    except Exception as e:
+        logger.exception("Error generating alternative schedules:")
         return jsonify({
             "error": str(e),
             "metadata": {
@@ -109,6 +540,147 @@ def generate_schedule():
             }
         }), 500
 
+def alternatives_response(picked, candidates, count, catalog_id):
+    """The /generate-alternatives JSON for the picked (variant, result) pairs."""
+    compact = request.args.get("shape") == "compact"
+    with timed("serialize"):
+        encoded = [
+            response_encoder.encode(result, catalog_id, compact, {"rank": n, "variant": variant})
+            for n, (variant, result) in enumerate(picked, 1)
+        ]
+        body = encode_object({
+            "alternatives": "[" + ",".join(encoded) + "]",
+            "requested": dumps(count),
+            "candidates": dumps(candidates),
+            "timestamp": dumps(str(datetime.now())),
+        })
+    return Response(body + "\n", mimetype="application/json")
+
+def job_links(job):
+    return {
+        "statusUrl": f"/jobs/{job.job_id}",
+        "resultUrl": f"/jobs/{job.job_id}/result",
+    }
+
+@app.route('/jobs', methods=['POST', 'OPTIONS'])
+def submit_job():
+    """Queue a /generate-schedule payload and return its job id without waiting.
+
+    Submitting a payload identical to a queued, running or finished (unexpired)
+    job returns that job instead of starting another.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        with timed("parse"):
+            data = request.json
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid payload structure"}), 400
+        cache_key = schedule_key(data)
+        schedule_result = schedule_cache.get(cache_key)
+        if schedule_result is not None:
+            job, deduplicated = job_queue.complete(cache_key, schedule_result)
+        else:
+            job, deduplicated = job_queue.submit(
+                cache_key,
+                lambda job: build_schedule(data, cache_key, job.progress),
+                scheduler.progress_channel,
+            )
+        logger.info(f"Job {job.job_id} {'reused' if deduplicated else 'submitted'} ({job.status})")
+        return jsonify({
+            **job.describe(),
+            **job_links(job),
+            "deduplicated": deduplicated,
+            "timestamp": str(datetime.now())
+        }), 200 if job.finished else 202
+    except QueueFull as e:
+        logger.warning(str(e))
+        return jsonify({"error": str(e)}), 429
+    except Exception as e:
+        logger.exception("Error submitting job:")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress (semesters placed so far) of a job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job '{job_id}'"}), 404
+    return jsonify({
+        **job.describe(),
+        **job_links(job),
+        "timestamp": str(datetime.now())
+    })
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """The finished schedule, shaped like a /generate-schedule response"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job '{job_id}'"}), 404
+    if not job.finished:
+        return jsonify({
+            **job.describe(),
+            **job_links(job),
+            "timestamp": str(datetime.now())
+        }), 202
+    if job.result is None:
+        return jsonify({"jobId": job.job_id, "error": job.error}), job.http_status
+    return schedule_response(job.result, jobId=job.job_id)
+
+@app.route('/catalogs', methods=['POST', 'OPTIONS'])
+def register_catalog():
+    """Upload a class list once and get back its content-addressed catalogId"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({"error": "Invalid payload structure: expected 'classes' or 'courseData'"}), 400
+        catalog, error, created = catalog_store.register(data)
+        if error:
+            logger.error(f"Catalog registration failed: {error}")
+            return jsonify({"error": error}), 400
+        logger.info(f"Catalog {catalog.catalog_id} {'registered' if created else 'already registered'} with {len(catalog.classes)} classes")
+        return jsonify({
+            **catalog.describe(),
+            "created": created,
+            "timestamp": str(datetime.now())
+        }), 201 if created else 200
+    except Exception as e:
+        logger.exception("Error registering catalog:")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/catalogs/<catalog_id>', methods=['GET'])
+def get_catalog(catalog_id):
+    """Check whether a catalog is still registered"""
+    catalog = catalog_store.get(catalog_id)
+    if catalog is None:
+        return jsonify({"error": f"Unknown catalogId '{catalog_id}'"}), 404
+    return jsonify({
+        **catalog.describe(),
+        "timestamp": str(datetime.now())
+    })
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss statistics for the caches and the scheduling backend"""
+    return jsonify({
+        "schedule_cache": schedule_cache.stats(),
+        "catalog_store": catalog_store.stats(),
+        "course_fragments": response_encoder.stats(),
+        "scheduler": scheduler.stats(),
+        "jobs": job_queue.stats(),
+        "timestamp": str(datetime.now())
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage latency, catalog size and schedule length histograms (Prometheus text format)"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/test-connection', methods=['POST'])
 def test_connection():
     """Test endpoint to verify connection and payload handling"""
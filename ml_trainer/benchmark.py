@@ -0,0 +1,159 @@
+"""Scaling benchmark for payload processing and both schedulers.
+
+    python benchmark.py                      # run and compare with benchmark_baseline.json
+    python benchmark.py --sizes 100,1000     # pick catalog sizes
+    python benchmark.py --save               # record the current numbers as the baseline
+
+Exits non-zero when a timing or peak-memory figure is worse than the
+baseline by more than the tolerance. Baselines are machine-specific; refresh
+them with --save on the machine the comparison runs on.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from data_processor import ScheduleDataProcessor
+from run_credits_simple import create_schedule as credits_schedule
+from run_semester_simple import create_schedule as semester_schedule
+from synthetic_catalog import CatalogSpec, generate_payload
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_BASELINE = HERE / "benchmark_baseline.json"
+DEFAULT_SIZES = (100, 500, 2000, 5000)
+
+# ----------------------------- Measurement -----------------------------
+
+
+def _best_time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_kb(fn: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def measure(size: int, repeat: int, spec_overrides: Dict) -> Dict[str, Dict]:
+    spec = CatalogSpec(classes=size, **spec_overrides)
+    payload = generate_payload(spec)
+    processor = ScheduleDataProcessor()
+    processed = processor.process_payload(payload)
+    semester_processed = {**processed, "parameters": {**processed["parameters"], "approach": "semester-based"}}
+
+    cases = {
+        "process_payload": lambda: processor.process_payload(payload),
+        "credits_create_schedule": lambda: credits_schedule(processed),
+        "semester_create_schedule": lambda: semester_schedule(semester_processed),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = {"seconds": round(_best_time(fn, repeat), 6), "peak_kb": _peak_kb(fn)}
+    return results
+
+
+def run(sizes: List[int], repeat: int, spec_overrides: Dict) -> Dict:
+    spec = {k: v for k, v in CatalogSpec(**spec_overrides).describe().items() if k != "classes"}
+    report = {"spec": spec, "repeat": repeat, "sizes": {}}
+    for size in sizes:
+        report["sizes"][str(size)] = measure(size, repeat, spec_overrides)
+    return report
+
+# ----------------------------- Baselines -----------------------------
+
+
+def compare(report: Dict, baseline: Dict, time_tolerance: float, memory_tolerance: float) -> List[str]:
+    """Return a line per figure that regressed past its tolerance."""
+    regressions = []
+    for size, cases in report["sizes"].items():
+        for name, figures in cases.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            if figures["seconds"] > base["seconds"] * (1 + time_tolerance):
+                regressions.append(f"{name} @ {size} classes: {figures['seconds']:.4f}s vs baseline {base['seconds']:.4f}s")
+            if figures["peak_kb"] > base["peak_kb"] * (1 + memory_tolerance):
+                regressions.append(f"{name} @ {size} classes: {figures['peak_kb']:.0f} KiB peak vs baseline {base['peak_kb']:.0f} KiB")
+    return regressions
+
+
+def print_report(report: Dict, baseline: Dict) -> None:
+    print(f"{'classes':>8}  {'case':<26}{'seconds':>10}{'base':>10}{'peak KiB':>11}{'base':>11}")
+    for size, cases in report["sizes"].items():
+        for name, figures in cases.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(name, {})
+            base_s = f"{base['seconds']:.4f}" if base else "-"
+            base_kb = f"{base['peak_kb']:.0f}" if base else "-"
+            print(f"{size:>8}  {name:<26}{figures['seconds']:>10.4f}{base_s:>10}{figures['peak_kb']:>11.0f}{base_kb:>11}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument("--depth", type=int, default=CatalogSpec.depth)
+    parser.add_argument("--fan-out", type=int, default=CatalogSpec.fan_out)
+    parser.add_argument("--coreq-density", type=float, default=CatalogSpec.coreq_density)
+    parser.add_argument("--offer-probability", type=float, default=CatalogSpec.offer_probability)
+    parser.add_argument("--religion-share", type=float, default=CatalogSpec.religion_share)
+    parser.add_argument("--eil-share", type=float, default=CatalogSpec.eil_share)
+    parser.add_argument("--major-share", type=float, default=CatalogSpec.major_share)
+    parser.add_argument("--seed", type=int, default=CatalogSpec.seed)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.5,
+                        help="allowed slowdown as a fraction of the baseline (default 0.5 = +50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    # The schedulers log at INFO per request; keep that out of the timings
+    logging.disable(logging.INFO)
+
+    spec_overrides = {
+        "depth": args.depth,
+        "fan_out": args.fan_out,
+        "coreq_density": args.coreq_density,
+        "offer_probability": args.offer_probability,
+        "religion_share": args.religion_share,
+        "eil_share": args.eil_share,
+        "major_share": args.major_share,
+        "seed": args.seed,
+    }
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run(sizes, max(1, args.repeat), spec_overrides)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    if baseline and baseline.get("spec") != report["spec"]:
+        print("Catalog spec differs from the baseline's; skipping the comparison.")
+        baseline = {}
+    print_report(report, baseline)
+
+    if args.save:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+
+    regressions = compare(report, baseline, args.time_tolerance, args.memory_tolerance)
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from course_graph import term_mask
+from meeting_times import book, meeting_options
+
+
+@dataclass
+class CatalogAnalysis:
+    """Classes of a catalog that no schedule can place, found without scheduling.
+
+    ``bundles`` holds (credits, class ids) for every corequisite bundle (a
+    class plus the corequisites it pulls in; a single class when it has
+    none), heaviest first, so the check against a request's credit caps stops
+    at the first bundle that fits.
+    """
+    cycles: List[List[Any]] = field(default_factory=list)
+    never_offered: List[Any] = field(default_factory=list)
+    unreachable: List[Any] = field(default_factory=list)
+    bundles: List[Tuple[int, Tuple[Any, ...]]] = field(default_factory=list)
+    clashing: List[List[Any]] = field(default_factory=list)
+
+    def diagnostics(self, largest_cap: int) -> Optional[Dict]:
+        """Structured problems for a request whose terms allow at most ``largest_cap`` credits; None if none."""
+        oversize = []
+        for credits, ids in self.bundles:
+            if credits <= largest_cap:
+                break
+            oversize.append({"classes": list(ids), "credits": credits, "cap": largest_cap})
+        if not (self.cycles or self.never_offered or self.unreachable or oversize or self.clashing):
+            return None
+        return {
+            "cycles": self.cycles,
+            "neverOffered": self.never_offered,
+            "unreachable": self.unreachable,
+            "oversizeBundles": oversize,
+            "meetingConflicts": self.clashing,
+        }
+
+
+def _strongly_connected(prereqs: List[List[int]]) -> List[List[int]]:
+    """Tarjan's algorithm without recursion; returns components of more than one class or with a self-loop."""
+    n = len(prereqs)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack: List[int] = []
+    components = []
+    counter = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, k = work[-1]
+            if k == 0:
+                index[v] = low[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = 1
+            if k < len(prereqs[v]):
+                work[-1] = (v, k + 1)
+                w = prereqs[v][k]
+                if index[w] < 0:
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    component.append(w)
+                    if w == v:
+                        break
+                if len(component) > 1 or v in prereqs[v]:
+                    components.append(sorted(component))
+    return components
+
+
+def analyze_classes(classes: Dict[Any, Dict]) -> CatalogAnalysis:
+    """Checks over processed classes (see ScheduleDataProcessor.analyze).
+
+    Linear in classes and requisites, apart from walking each class's
+    corequisite bundle, which stays cheap while bundles are small.
+
+    - cycles: classes that are each other's prerequisites, directly or not
+    - never_offered: classes offered in no Fall, Winter or Spring term
+    - unreachable: classes behind one of those through their prerequisites
+    - bundles: corequisite bundles and their credits
+    - clashing: corequisite bundles whose classes can't all meet at once
+    """
+    ids = list(classes)
+    index = {cid: i for i, cid in enumerate(ids)}
+    n = len(ids)
+    prereqs: List[List[int]] = [[] for _ in range(n)]
+    dependents: List[List[int]] = [[] for _ in range(n)]
+    coreqs: List[List[int]] = [[] for _ in range(n)]
+    credits = [0] * n
+    blocked = bytearray(n)
+    analysis = CatalogAnalysis()
+    for i, data in enumerate(classes.values()):
+        credits[i] = int(data.get("credits") or 0)
+        if not term_mask(data.get("semesters_offered", [])):
+            blocked[i] = 1
+            analysis.never_offered.append(ids[i])
+        for pid in data.get("prerequisites") or []:
+            j = index.get(pid)
+            if j is not None:
+                prereqs[i].append(j)
+                dependents[j].append(i)
+        for qid in data.get("corequisites") or []:
+            j = index.get(qid)
+            if j is not None:
+                coreqs[i].append(j)
+
+    for component in _strongly_connected(prereqs):
+        analysis.cycles.append([ids[i] for i in component])
+        for i in component:
+            blocked[i] = 1
+
+    # Everything that needs a blocked class, however indirectly, is blocked too
+    frontier = [i for i in range(n) if blocked[i]]
+    reached = bytearray(blocked)
+    while frontier:
+        i = frontier.pop()
+        for d in dependents[i]:
+            if not reached[d]:
+                reached[d] = 1
+                frontier.append(d)
+    analysis.unreachable = [ids[i] for i in range(n) if reached[i] and not blocked[i]]
+
+    # A class drags its corequisites (and theirs) into the same term
+    seen_bundles = set()
+    for i in range(n):
+        if not coreqs[i]:
+            analysis.bundles.append((credits[i], (ids[i],)))
+            continue
+        bundle = {i}
+        stack = [i]
+        while stack:
+            for j in coreqs[stack.pop()]:
+                if j not in bundle:
+                    bundle.add(j)
+                    stack.append(j)
+        key = frozenset(bundle)
+        if key in seen_bundles:
+            continue
+        seen_bundles.add(key)
+        analysis.bundles.append((sum(credits[j] for j in bundle), tuple(ids[j] for j in sorted(bundle))))
+        meetings = [meeting_options(classes[ids[j]].get("days_offered"), classes[ids[j]].get("times_offered"))
+                    for j in sorted(bundle)]
+        if book(0, meetings) is None:
+            analysis.clashing.append([ids[j] for j in sorted(bundle)])
+    analysis.bundles.sort(key=lambda b: -b[0])
+    return analysis
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+from course_graph import CourseGraph, TERM_BITS
+from metrics import timed
+from schedule_engine import priority_rank, term_depths
+from vector_ops import mask_bits
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CSCAT\x00\x00\x01"
+
+# CourseGraph arrays stored as they are
+ARRAY_COLUMNS = (
+    "ids", "credits", "terms", "flags",
+    "prereq_offsets", "prereq_targets",
+    "dependent_offsets", "dependent_targets",
+    "coreq_offsets", "coreq_targets",
+    "bundle_offsets", "bundle_members",
+    "bundle_credits", "bundle_religion", "bundle_majors",
+)
+# Per-course values kept as JSON, decoded one course at a time
+TEXT_COLUMNS = ("class_names", "class_numbers", "from_courses")
+# Rankings every scheduler run would otherwise derive again in each process
+DERIVED_COLUMNS = {"priority_rank": priority_rank, "term_depth": term_depths}
+
+
+class TextColumn(Sequence):
+    """JSON values packed into one buffer, decoded on access."""
+
+    def __init__(self, offsets: Sequence[int], blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i += len(self)
+        return json.loads(bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]))
+
+
+class TableColumn(Sequence):
+    """Per-course positions into a small table of distinct values (offering lists, meeting times)."""
+
+    def __init__(self, positions: Sequence[int], table: List[Any]):
+        self.positions = positions
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, i: int) -> Any:
+        return self.table[self.positions[i]]
+
+
+class IdIndex:
+    """Catalog id -> first index with that id, by binary search over the stored sort order."""
+
+    def __init__(self, sorted_ids: Sequence[int], order: Sequence[int]):
+        self.sorted_ids = sorted_ids
+        self.order = order
+
+    def get(self, course_id: Any, default: Optional[int] = None) -> Optional[int]:
+        k = bisect_left(self.sorted_ids, course_id) if isinstance(course_id, int) else len(self.order)
+        if k < len(self.order) and self.sorted_ids[k] == course_id:
+            return self.order[k]
+        return default
+
+
+def _table(values: Sequence[Any]) -> tuple:
+    table: List[Any] = []
+    positions: Dict[Any, int] = {}
+    index = array("l")
+    for value in values:
+        if value not in positions:
+            positions[value] = len(table)
+            table.append(value)
+        index.append(positions[value])
+    return table, index
+
+
+@timed("write_catalog")
+def write_catalog(graph: CourseGraph, path: str) -> None:
+    """Write a compiled catalog to ``path`` (atomically) in the format load_catalog maps.
+
+    Native byte order and sizes: the file is for processes on the same host.
+    """
+    columns = {name: getattr(graph, name) for name in ARRAY_COLUMNS}
+    for name, derive in DERIVED_COLUMNS.items():
+        columns[name] = array("l", derive(graph))
+    order = sorted(range(len(graph)), key=lambda i: (graph.ids[i], i))
+    columns["id_order"] = array("l", order)
+    columns["sorted_ids"] = array("q", (graph.ids[i] for i in order))
+    offered, columns["offered_index"] = _table(graph.offered)
+    meetings, columns["meeting_index"] = _table(graph.meetings)
+    for name in TEXT_COLUMNS:
+        values = [json.dumps(v, default=str).encode("utf-8") for v in getattr(graph, name)]
+        offsets = array("q", [0])
+        for value in values:
+            offsets.append(offsets[-1] + len(value))
+        columns[name + "_offsets"] = offsets
+        columns[name] = array("B", b"".join(values))
+
+    header = {
+        "count": len(graph),
+        "offered": [list(v) for v in offered],
+        "meetings": [[format(mask, "x") for mask in v] for v in meetings],
+        "columns": {},
+    }
+    # Lay the columns out 8-byte aligned after the header
+    layout = []
+    position = 0
+    for name, values in columns.items():
+        layout.append((name, values, position))
+        header["columns"][name] = [values.typecode, position, len(values)]
+        position += -(-len(values) * values.itemsize // 8) * 8
+    encoded = json.dumps(header).encode("utf-8")
+    start = -(-(len(MAGIC) + 8 + len(encoded)) // 8) * 8
+
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, values, offset in layout:
+            f.seek(start + offset)
+            f.write(values.tobytes())
+        f.truncate(start + position)
+    os.replace(temp, path)
+
+
+@timed("map_catalog")
+def load_catalog(path: str) -> CourseGraph:
+    """Map a written catalog read-only; columns are views of the mapping, not copies.
+
+    The pages are shared with every other process that maps the same file.
+    """
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a compiled catalog")
+    size = int.from_bytes(view[len(MAGIC):len(MAGIC) + 8], "little")
+    header_end = len(MAGIC) + 8 + size
+    header = json.loads(bytes(view[len(MAGIC) + 8:header_end]))
+    start = -(-header_end // 8) * 8
+
+    columns = {}
+    for name, (typecode, offset, count) in header["columns"].items():
+        itemsize = array(typecode).itemsize
+        columns[name] = view[start + offset:start + offset + count * itemsize].cast(typecode)
+
+    graph = CourseGraph.__new__(CourseGraph)
+    for name in ARRAY_COLUMNS:
+        setattr(graph, name, columns[name])
+    for name in TEXT_COLUMNS:
+        setattr(graph, name, TextColumn(columns[name + "_offsets"], columns[name]))
+    graph.offered = TableColumn(columns["offered_index"], [tuple(v) for v in header["offered"]])
+    meetings = [tuple(int(mask, 16) for mask in v) for v in header["meetings"]]
+    graph.meetings = TableColumn(columns["meeting_index"], meetings)
+    graph.has_meetings = any(meetings)
+    graph.index = IdIndex(columns["sorted_ids"], columns["id_order"])
+    graph.term_sets = {term: mask_bits(graph.terms, bit) for term, bit in TERM_BITS.items()}
+    graph.derived = {name: columns[name] for name in DERIVED_COLUMNS}
+    # Keeps the mapping open for as long as the graph is used
+    graph.mapping = mapping
+    return graph
+
+
+class CatalogFiles:
+    """Compiled catalogs written once to a directory and mapped by every process.
+
+    Files are named after the catalog id, which is a content hash, so any
+    process that finds one can map it instead of compiling the classes. A
+    directory on tmpfs (/dev/shm) keeps them in memory. Past ``max_files``
+    the least recently used are removed; processes that mapped one keep it.
+    """
+
+    def __init__(self, directory: str, max_files: int = 256):
+        self.directory = directory
+        self.max_files = max(1, int(max_files))
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, catalog_id: str) -> str:
+        name = hashlib.sha256(str(catalog_id).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, name + ".catalog")
+
+    def load(self, catalog_id: str) -> Optional[CourseGraph]:
+        """The mapped catalog, or None when no process has written it yet."""
+        path = self.path(catalog_id)
+        try:
+            graph = load_catalog(path)
+            os.utime(path)
+            return graph
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable compiled catalog {path}: {e}")
+            return None
+
+    def store(self, catalog_id: str, graph: CourseGraph) -> CourseGraph:
+        """Write a compiled catalog and return it mapped, dropping this process's private copy."""
+        path = self.path(catalog_id)
+        try:
+            write_catalog(graph, path)
+            self._evict()
+            return load_catalog(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not share compiled catalog {path}: {e}")
+            return graph
+
+    def graph(self, catalog_id: str, classes: Dict) -> CourseGraph:
+        """Map the catalog if it was written, else compile ``classes`` and write it."""
+        graph = self.load(catalog_id)
+        if graph is None:
+            graph = self.store(catalog_id, CourseGraph.from_processed({"classes": classes}))
+        return graph
+
+    def _evict(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".catalog"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass  # removed by another process meanwhile
+        if len(files) <= self.max_files:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "files": sum(1 for name in os.listdir(self.directory) if name.endswith(".catalog")),
+            "max_files": self.max_files,
+        }
+
+
+def catalog_files() -> Optional[CatalogFiles]:
+    """The shared catalog directory set by CATALOG_FILE_DIR, if any."""
+    directory = os.environ.get('CATALOG_FILE_DIR', '')
+    if not directory:
+        return None
+    return CatalogFiles(directory, int(os.environ.get('CATALOG_FILE_MAX', 256)))
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from catalog_file import CatalogFiles
+from course_graph import CourseGraph
+from data_processor import ScheduleDataProcessor
+from schedule_cache import LRUCache, classes_key
+
+
+@dataclass
+class Catalog:
+    """A processed, compiled class list registered once and referenced by id."""
+    catalog_id: str
+    classes: Dict
+    graph: CourseGraph
+    created_at: str
+
+    def describe(self) -> Dict:
+        return {
+            "catalogId": self.catalog_id,
+            "total_classes": len(self.classes),
+            "created_at": self.created_at,
+        }
+
+
+class CatalogStore:
+    """Content-addressed catalogs kept server-side between requests.
+
+    The id is the same canonical class hash the schedule cache uses, so the
+    same class list always maps to the same id and uploading it twice is a
+    no-op. With ``files`` the compiled graph is the shared, memory-mapped
+    copy (see catalog_file), mapped rather than compiled when another
+    process registered the same classes first.
+    """
+
+    def __init__(self, processor: ScheduleDataProcessor, max_entries: int = 64, ttl_seconds: float = 86400.0,
+                 files: Optional[CatalogFiles] = None):
+        self.processor = processor
+        self.files = files
+        self._catalogs = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def register(self, payload: Dict) -> Tuple[Optional[Catalog], Optional[str], bool]:
+        """Process and compile a payload's classes.
+
+        Returns (catalog, error, created); ``created`` is False when the same
+        class list was already registered.
+        """
+        catalog_id = classes_key(payload)
+        existing = self._catalogs.get(catalog_id)
+        if existing is not None:
+            return existing, None, False
+
+        processed = self.processor.process_classes(payload)
+        if "error" in processed:
+            return None, processed["error"], False
+        graph = self.files.load(catalog_id) if self.files is not None else None
+        if graph is None:
+            graph = self.processor.build_catalog(processed)
+            if self.files is not None:
+                graph = self.files.store(catalog_id, graph)
+        catalog = Catalog(
+            catalog_id=catalog_id,
+            classes=processed["classes"],
+            graph=graph,
+            created_at=datetime.now().isoformat(),
+        )
+        self._catalogs.put(catalog_id, catalog)
+        return catalog, None, True
+
+    def get(self, catalog_id: str) -> Optional[Catalog]:
+        return self._catalogs.get(catalog_id)
+
+    def stats(self) -> Dict:
+        return self._catalogs.stats()
@@ -0,0 +1,221 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from meeting_times import meeting_options
+from metrics import timed
+from vector_ops import mask_bits
+
+EIL_SET = {"STDEV 100R", "EIL 201", "EIL 313", "EIL 317", "EIL 320"}
+
+# Course category flags
+RELIGION = 1
+EIL = 2
+MAJOR = 4
+MINOR = 8
+
+# Term offering bits
+TERM_BITS = {"Fall": 1, "Winter": 2, "Spring": 4}
+
+
+def course_flags(data: Dict) -> int:
+    """Resolve a processed class's categories into flag bits.
+
+    Religion: normalized ``from_course`` or a ``REL `` class number. EIL:
+    ``from_course`` or one of EIL_SET. Major: ``from_course`` or a ``CS ``
+    class number. Minor: ``from_course`` only.
+    """
+    from_course = data.get("from_course")
+    label = from_course.lower() if isinstance(from_course, str) else ""
+    class_number = str(data.get("class_number", ""))
+    flags = 0
+    if label == "religion" or class_number.startswith("REL "):
+        flags |= RELIGION
+    if label == "eil" or class_number in EIL_SET:
+        flags |= EIL
+    if label == "major" or class_number.startswith("CS "):
+        flags |= MAJOR
+    if label == "minor":
+        flags |= MINOR
+    return flags
+
+
+def term_mask(semesters_offered: Sequence[str]) -> int:
+    mask = 0
+    for term in semesters_offered or []:
+        mask |= TERM_BITS.get(term, 0)
+    return mask
+
+
+def bitset(indices: Iterable[int], n: int) -> int:
+    """Pack catalog indices into an int bitmask (bit i set for index i)."""
+    bits = bytearray((n + 7) // 8)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _csr(rows: List[List[int]]) -> Tuple[array, array]:
+    """Pack per-row index lists into offsets/targets arrays."""
+    offsets = array("l", [0])
+    targets = array("l")
+    for row in rows:
+        targets.extend(row)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+class CourseGraph:
+    """Compiled, array-backed catalog shared by the schedulers.
+
+    Courses are addressed by their position in ``processed["classes"]`` (dict
+    order). Numeric columns (credits, term bitmasks, category flags, bundle
+    totals) are flat arrays, and prerequisite, dependent, corequisite and
+    corequisite-closure lists are stored CSR-style as an offsets array plus a
+    targets array, so a catalog costs a handful of objects rather than a dict
+    and a dataclass per class.
+    """
+
+    def __init__(self, classes: Dict[Any, Dict]):
+        self.ids = array("q", (int(cid) for cid in classes))
+        self.index: Dict[int, int] = {}
+        for i, cid in enumerate(self.ids):
+            # Keep the first occurrence, like the old linear scans did
+            self.index.setdefault(cid, i)
+
+        n = len(self.ids)
+        self.class_names: List[Any] = []
+        self.class_numbers: List[str] = []
+        self.from_courses: List[Optional[str]] = []
+        # Offering lists are kept verbatim for output; most catalogs only
+        # have a handful of distinct ones, so share the tuples.
+        self.offered: List[Tuple[str, ...]] = []
+        self.credits = array("l")
+        self.terms = array("B")
+        self.flags = array("B")
+        # Meeting-time options per course as weekly minute masks (see
+        # meeting_times); () for courses without set times, shared like offered
+        self.meetings: List[Tuple[int, ...]] = []
+        meeting_cache: Dict[Tuple, Tuple[int, ...]] = {}
+
+        prereqs: List[List[int]] = [[] for _ in range(n)]
+        dependents: List[List[int]] = [[] for _ in range(n)]
+        coreqs: List[List[int]] = [[] for _ in range(n)]
+        interned: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+        for i, data in enumerate(classes.values()):
+            offered = tuple(data.get("semesters_offered", []))
+            self.offered.append(interned.setdefault(offered, offered))
+            self.class_names.append(data.get("class_name", ""))
+            self.class_numbers.append(str(data.get("class_number", "")))
+            self.from_courses.append(data.get("from_course"))
+            self.credits.append(int(data.get("credits") or 0))
+            self.terms.append(term_mask(offered))
+            self.flags.append(course_flags(data))
+            days, times = data.get("days_offered") or (), data.get("times_offered") or ()
+            if days and times:
+                key = (str(days), str(times))
+                if key not in meeting_cache:
+                    meeting_cache[key] = meeting_options(days, times)
+                self.meetings.append(meeting_cache[key])
+            else:
+                self.meetings.append(())
+            for pid in data.get("prerequisites") or []:
+                j = self.index.get(pid)
+                if j is None:
+                    continue
+                prereqs[i].append(j)
+                dependents[j].append(i)
+            for qid in data.get("corequisites") or []:
+                j = self.index.get(qid)
+                if j is not None:
+                    coreqs[i].append(j)
+
+        self.prereq_offsets, self.prereq_targets = _csr(prereqs)
+        self.dependent_offsets, self.dependent_targets = _csr(dependents)
+        self.coreq_offsets, self.coreq_targets = _csr(coreqs)
+        self.bundle_offsets, self.bundle_members = _csr([self._closure(i, coreqs) for i in range(n)])
+        # Whether any course has set meeting times; placement only tracks them then
+        self.has_meetings = any(self.meetings)
+
+        # Bitsets over catalog indices: the courses each term offers
+        self.term_sets: Dict[str, int] = {term: mask_bits(self.terms, bit) for term, bit in TERM_BITS.items()}
+        # Values the schedulers derive from the catalog on first use, such as
+        # the priority ranking, kept here so they are computed once per catalog
+        self.derived: Dict[str, Any] = {}
+
+        # Per-bundle totals so admission checks don't walk the bundle
+        self.bundle_credits = array("l")
+        self.bundle_religion = array("l")
+        self.bundle_majors = array("l")
+        for i in range(n):
+            bundle = self.bundle(i)
+            self.bundle_credits.append(sum(self.credits[j] for j in bundle))
+            self.bundle_religion.append(sum(1 for j in bundle if self.flags[j] & RELIGION))
+            self.bundle_majors.append(sum(1 for j in bundle if self.flags[j] & MAJOR))
+
+    @classmethod
+    @timed("build_catalog")
+    def from_processed(cls, processed: Dict) -> "CourseGraph":
+        return cls(processed.get("classes") or {})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _closure(start: int, coreqs: List[List[int]]) -> List[int]:
+        # Same depth-first walk as the old get_course_and_coreqs, so bundle
+        # order (and therefore placement order) is unchanged.
+        bundle = [start]
+        to_visit = [start]
+        seen = {start}
+        while to_visit:
+            cur = to_visit.pop()
+            for j in coreqs[cur]:
+                if j in seen:
+                    continue
+                seen.add(j)
+                bundle.append(j)
+                to_visit.append(j)
+        return bundle
+
+    # ----------------------------- Row access -----------------------------
+
+    def prereqs(self, i: int) -> array:
+        return self.prereq_targets[self.prereq_offsets[i]:self.prereq_offsets[i + 1]]
+
+    def dependents(self, i: int) -> array:
+        return self.dependent_targets[self.dependent_offsets[i]:self.dependent_offsets[i + 1]]
+
+    def coreqs(self, i: int) -> array:
+        return self.coreq_targets[self.coreq_offsets[i]:self.coreq_offsets[i + 1]]
+
+    def bundle(self, i: int) -> array:
+        """Indices of a course and its corequisite closure, course first."""
+        return self.bundle_members[self.bundle_offsets[i]:self.bundle_offsets[i + 1]]
+
+    def prereq_count(self, i: int) -> int:
+        return self.prereq_offsets[i + 1] - self.prereq_offsets[i]
+
+    def prereq_ids(self, i: int) -> List[int]:
+        return [self.ids[j] for j in self.prereqs(i)]
+
+    def coreq_ids(self, i: int) -> List[int]:
+        return [self.ids[j] for j in self.coreqs(i)]
+
+    def index_of(self, course_id: int) -> Optional[int]:
+        return self.index.get(course_id)
+
+    def offered_in(self, i: int, sem_type: str) -> bool:
+        return bool(self.terms[i] & TERM_BITS.get(sem_type, 0))
+
+    def course_dict(self, i: int) -> Dict:
+        return {
+            "id": self.ids[i],
+            "class_name": self.class_names[i],
+            "class_number": self.class_numbers[i],
+            "credits": self.credits[i],
+            "prerequisites": self.prereq_ids(i),
+            "corequisites": self.coreq_ids(i),
+            "semesters_offered": list(self.offered[i]),
+            "from_course": self.from_courses[i]
+        }
@@ -1,17 +1,25 @@
-import json
-from typing import Dict, List, Any, Set, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 import logging
 from datetime import datetime
 
+from catalog_analysis import CatalogAnalysis, analyze_classes
+from course_graph import CourseGraph, TERM_BITS
+from elective_selection import ElectiveSection, select_electives
+from metrics import Preview, timed
+from schedule_cache import LRUCache
+from schedule_engine import term_ordinal
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ScheduleDataProcessor:
     """Process raw schedule data from JSON payloads into a format suitable for optimization"""
     
-    def __init__(self):
+    def __init__(self, max_analyses: int = 64, analysis_ttl_seconds: float = 86400.0):
         self.class_dependencies = {}
         self.class_info = {}
+        # Catalog analyses keyed by catalog id (see analyze)
+        self._analyses = LRUCache(max_entries=max_analyses, ttl_seconds=analysis_ttl_seconds)
     
     def _normalize_from_course(self, label: Any = None, *, course_type: Any = None, class_number: Any = None, course_name: Any = None) -> str:
         """Return one of {'major','minor','eil','religion'} based on provided hints.
@@ -81,21 +89,299 @@ class ScheduleDataProcessor:
         if isinstance(processed_data, dict) and 'classes' in processed_data:
             try:
                 logger.info(f"Processed {len(processed_data['classes'])} classes")
-                logger.info(f"First 3 processed classes: {list(processed_data['classes'].items())[:3]}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("First 3 processed classes: %s", Preview(list(processed_data['classes'].items())[:3]))
             except Exception:
                 # Avoid breaking on logging if something is off
                 pass
         
         return processed_data
 
+    def build_catalog(self, processed: Dict) -> CourseGraph:
+        """Compile processed classes into the array-backed catalog the schedulers consume."""
+        return CourseGraph.from_processed(processed)
+
+    def process_classes(self, payload: Dict) -> Dict:
+        """Normalize and validate only the class section of a payload.
+
+        Used to register a catalog once; schedule requests against it then
+        only need their preferences processed (see process_with_catalog).
+        """
+        has_classes = isinstance(payload.get("classes"), list)
+        has_course_data = isinstance(payload.get("courseData"), list)
+        if not (has_classes or has_course_data):
+            logger.error("Missing classes/courseData in payload")
+            return {"error": "Invalid payload structure: expected 'classes' or 'courseData'"}
+
+        all_classes = self._build_classes(payload)
+        error = self._validate_classes(all_classes)
+        if error:
+            return {"error": error}
+        return {
+            "classes": all_classes,
+            "metadata": {
+                "total_classes": len(all_classes),
+                "processing_timestamp": datetime.now().isoformat(),
+            }
+        }
+
+    def process_with_catalog(self, payload: Dict, classes: Dict) -> Dict:
+        """Build processed data for a request whose classes were registered earlier."""
+        if not payload.get("preferences"):
+            logger.error("Missing preferences in payload")
+            return {"error": "Invalid payload structure"}
+
+        scheduling_params = self._build_parameters(payload.get("preferences", {}))
+        error = self._validate_parameters(scheduling_params)
+        if error:
+            return {"error": error}
+        pruned = self.prune_classes(classes, payload)
+        if "error" in pruned:
+            return pruned
+        classes = pruned["classes"]
+        return {
+            "classes": classes,
+            "parameters": scheduling_params,
+            "metadata": {
+                "total_classes": len(classes),
+                "processing_timestamp": datetime.now().isoformat(),
+                "eilLevel": scheduling_params.get("eilLevel"),
+            }
+        }
+
+    @timed("prune_classes")
+    def prune_classes(self, all_classes: Dict, payload: Dict) -> Dict:
+        """Narrow mapped classes to what the payload's student still needs.
+
+        Optional: runs only when the payload has "required" (class ids the
+        student has to take; by default every class outside an elective
+        section), "completed" (class ids already taken) or "selectElectives".
+        Keeps the required classes, a selection from each elective section of
+        their programs that the completed classes don't already cover (see
+        elective_selection.select_electives), and everything those need
+        through prerequisites and corequisites. Completed classes are left
+        out; a prerequisite missing from the classes counts as met.
+        Flat "classes" payloads give sections through each class's optional
+        course_id, section_id, is_elective_section, credits_needed and
+        elective_group; without them every class counts as required and
+        "selectElectives" is refused. ``all_classes`` isn't modified.
+
+        Returns {"classes": ...} or {"error": ...}.
+        """
+        required = payload.get("required")
+        completed = payload.get("completed") or []
+        if required is None and not completed and not payload.get("selectElectives"):
+            return {"classes": all_classes}
+        if not all(isinstance(v, list) and all(isinstance(cid, int) for cid in v)
+                   for v in (required or [], completed)):
+            return {"error": "Invalid payload structure: 'required' and 'completed' must be lists of class ids"}
+
+        if payload.get("selectElectives") and all(
+                cls.get("is_elective_section") is None for cls in all_classes.values()):
+            return {"error": "Invalid payload structure: 'selectElectives' needs classes with "
+                             "'course_id', 'section_id' and 'is_elective_section'"}
+
+        done = {cid for cid in completed if cid in all_classes}
+        if required is None:
+            needed = [cid for cid, cls in all_classes.items() if not cls.get("is_elective_section")]
+        else:
+            unknown = [cid for cid in required if cid not in all_classes]
+            if unknown:
+                return {"error": f"Unknown required class ids: {unknown[:10]}"}
+            needed = list(required)
+
+        keep: Set[Any] = set()
+        self._add_closure(all_classes, needed, done, keep)
+
+        # Elective sections only need credits_needed credits (and
+        # required_count classes per elective group); completed classes count
+        # towards their section
+        programs = {all_classes[cid].get("course_id") for cid in needed}
+        sections: Dict[Tuple[Any, Any], ElectiveSection] = {}
+        whole: List[Any] = []
+        for cid, cls in all_classes.items():
+            if not cls.get("is_elective_section") or cls.get("course_id") not in programs:
+                continue
+            try:
+                credits_needed = int(cls.get("credits_needed"))
+            except (TypeError, ValueError):
+                # No requirement to select against: the whole section is needed
+                whole.append(cid)
+                continue
+            key = (cls.get("course_id"), cls.get("section_id"))
+            section = sections.get(key)
+            if section is None:
+                section = sections[key] = ElectiveSection(key, credits_needed, [])
+            section.classes.append(cid)
+            group = cls.get("elective_group")
+            if isinstance(group, dict) and group.get("id") is not None:
+                section.group_counts[group["id"]] = int(group.get("required_count") or 0)
+        for section in sections.values():
+            for cid in section.classes:
+                if cid in done:
+                    cls = all_classes[cid]
+                    section.credits_needed -= int(cls.get("credits") or 0)
+                    group = cls.get("elective_group")
+                    if isinstance(group, dict) and group.get("id") in section.group_counts:
+                        section.group_counts[group["id"]] -= 1
+            section.group_counts = {g: n for g, n in section.group_counts.items() if n > 0}
+        open_sections = [s for s in sections.values() if s.credits_needed > 0 or s.group_counts]
+        for section in open_sections:
+            section.credits_needed = max(0, section.credits_needed)
+        chosen = select_electives(all_classes, keep, done, open_sections)
+        self._add_closure(all_classes, whole + list(chosen), done, keep)
+
+        classes = {cid: cls for cid, cls in all_classes.items() if cid in keep}
+        logger.info(f"Pruned catalog to {len(classes)} of {len(all_classes)} classes "
+                    f"({len(chosen)} electives chosen across {len(open_sections)} sections)")
+        return {"classes": classes}
+
+    @staticmethod
+    def _add_closure(all_classes: Dict, start: List[Any], done: Set[Any], keep: Set[Any]) -> None:
+        """Add ``start`` and everything it needs through requisites to ``keep``, skipping ``done``."""
+        stack = [cid for cid in start if cid not in done]
+        while stack:
+            cid = stack.pop()
+            if cid in keep:
+                continue
+            keep.add(cid)
+            cls = all_classes[cid]
+            for dep in (cls.get("prerequisites") or []) + (cls.get("corequisites") or []):
+                if dep in all_classes and dep not in done and dep not in keep:
+                    stack.append(dep)
+
+    @timed("analyze_catalog")
+    def analyze(self, classes: Dict, catalog_id: Optional[str] = None) -> CatalogAnalysis:
+        """Static checks over processed classes, cached per catalog id when one is given."""
+        analysis = self._analyses.get(catalog_id) if catalog_id else None
+        if analysis is None:
+            analysis = analyze_classes(classes)
+            if catalog_id:
+                self._analyses.put(catalog_id, analysis)
+        return analysis
+
+    def diagnose(self, processed: Dict, largest_cap: int, catalog_id: Optional[str] = None) -> Optional[Dict]:
+        """An error with structured diagnostics when some class can never be scheduled.
+
+        Prerequisite cycles, classes offered in no term, classes behind either,
+        corequisite bundles heavier than ``largest_cap`` (the highest credit
+        cap any term of the request gets) and corequisite bundles whose
+        meeting times clash would otherwise only show up as classes missing
+        from a full scheduler run. Returns None when the catalog is clean.
+
+        When rescheduling, classes already taken in locked semesters or
+        dropped don't count, so the catalog is analyzed without them (and
+        without the cache).
+        """
+        parameters = processed.get("parameters") or {}
+        settled = set(parameters.get("dropped") or [])
+        for sem in parameters.get("lockedSchedule") or []:
+            settled.update(c.get("id") for c in sem["classes"])
+        if settled:
+            classes = {cid: cls for cid, cls in processed["classes"].items() if cid not in settled}
+            analysis = self.analyze(classes)
+        else:
+            analysis = self.analyze(processed["classes"], catalog_id)
+        diagnostics = analysis.diagnostics(largest_cap)
+        if diagnostics is None:
+            return None
+        counts = [
+            (len(diagnostics["cycles"]), "prerequisite cycle(s)"),
+            (len(diagnostics["neverOffered"]), "class(es) offered in no term"),
+            (len(diagnostics["unreachable"]), "class(es) behind those"),
+            (len(diagnostics["oversizeBundles"]), f"corequisite bundle(s) over {largest_cap} credits"),
+            (len(diagnostics["meetingConflicts"]), "corequisite bundle(s) meeting at the same time"),
+        ]
+        summary = ", ".join(f"{count} {what}" for count, what in counts if count)
+        logger.error(f"Unschedulable catalog: {summary}")
+        return {"error": f"Unschedulable catalog: {summary}", "diagnostics": diagnostics}
+
+    def process_reschedule(self, payload: Dict, processed: Dict) -> Dict:
+        """Add a /reschedule payload's locked semesters and dropped classes to processed data.
+
+        ``schedule`` is the earlier plan (the ``schedule`` list create_schedule
+        returns), ``lockedSemesters`` the completed or locked terms, e.g.
+        "Fall 2025", and ``dropped`` the ids of classes no longer wanted.
+        Locking a term locks every term before it too, since later terms
+        build on them.
+        """
+        schedule = payload.get("schedule")
+        locked = payload.get("lockedSemesters") or []
+        dropped = payload.get("dropped") or []
+        if not isinstance(schedule, list) or not isinstance(locked, list) or not isinstance(dropped, list):
+            return {"error": "Invalid reschedule payload: expected 'schedule', 'lockedSemesters' and 'dropped' lists"}
+
+        labels = []
+        previous = None
+        for sem in schedule:
+            if (not isinstance(sem, dict) or sem.get("type") not in TERM_BITS
+                    or not isinstance(sem.get("year"), int) or not isinstance(sem.get("classes"), list)
+                    or not all(isinstance(c, dict) for c in sem["classes"])):
+                return {"error": "Invalid schedule: each semester needs a 'type', a 'year' and a 'classes' list"}
+            ordinal = term_ordinal(sem["type"], sem["year"])
+            if previous is not None and ordinal < previous:
+                return {"error": "Invalid schedule: semesters must be in chronological order"}
+            previous = ordinal
+            labels.append(f"{sem['type']} {sem['year']}")
+
+        count = 0
+        for label in locked:
+            if label not in labels:
+                return {"error": f"Locked semester '{label}' is not in the schedule"}
+            # The greedy can emit a term twice; lock through its last entry
+            count = max(count, len(labels) - labels[::-1].index(label))
+
+        dropped_ids = sorted({v for v in (d.get("id") if isinstance(d, dict) else d for d in dropped)
+                              if isinstance(v, int)})
+        prefix = []
+        for sem in schedule[:count]:
+            classes = [c for c in sem["classes"] if c.get("id") not in dropped_ids]
+            if len(classes) != len(sem["classes"]):
+                sem = {**sem, "classes": classes, "totalCredits": sum(c.get("credits", 0) for c in classes)}
+            prefix.append(sem)
+        logger.info(f"Rescheduling after {count} locked semesters with {len(dropped_ids)} dropped classes")
+
+        parameters = {**processed["parameters"], "lockedSchedule": prefix, "dropped": dropped_ids}
+        if prefix and not parameters.get("startSemester"):
+            parameters["startSemester"] = labels[0]
+        return {**processed, "parameters": parameters}
+
+    @timed("process_payload")
     def _process_payload_internal(self, payload: Dict) -> Dict:
         # Original process_payload logic here
         logger.info("Starting payload processing")
         
         # Log preferences
         preferences = payload.get("preferences", {})
-        logger.info(f"Raw preferences: {json.dumps(preferences, indent=2)}")
+        logger.info("Raw preferences: %s", Preview(preferences))
+
+        all_classes = self._build_classes(payload)
+        scheduling_params = self._build_parameters(preferences)
+
+        # Validate class data before returning
+        error = self._validate_classes(all_classes) or self._validate_parameters(scheduling_params)
+        if error:
+            return {"error": error}
+
+        pruned = self.prune_classes(all_classes, payload)
+        if "error" in pruned:
+            return pruned
+        all_classes = pruned["classes"]
+
+        # Add metadata to processed data
+        processed_data = {
+            "classes": all_classes,
+            "parameters": scheduling_params,
+            "metadata": {
+                "total_classes": len(all_classes),
+                "processing_timestamp": datetime.now().isoformat(),
+                "eilLevel": scheduling_params.get("eilLevel"),
+            }
+        }
 
+        return processed_data
+
+    def _build_classes(self, payload: Dict) -> Dict[Any, Dict]:
         # Build classes mapping from either new 'classes' or legacy 'courseData'
         all_classes: Dict[Any, Dict] = {}
 
@@ -135,12 +421,14 @@ class ScheduleDataProcessor:
                     "days_offered": cls.get("days_offered", []),
                     "times_offered": cls.get("times_offered", []),
                     "from_course": normalized_from,
-                    # Legacy fields not available in new payload
-                    "course_id": None,
-                    "course_type": None,
-                    "section_id": None,
-                    "is_elective_section": None,
-                    "credits_needed": None,
+                    # Optional program/section fields (always present in
+                    # courseData); pruning needs them to find elective sections
+                    "course_id": cls.get("course_id"),
+                    "course_type": cls.get("course_type"),
+                    "section_id": cls.get("section_id"),
+                    "is_elective_section": cls.get("is_elective_section"),
+                    "credits_needed": cls.get("credits_needed", cls.get("credits_needed_to_take")),
+                    "elective_group": cls.get("elective_group"),
                 }
         else:
             # Legacy nested format under 'courseData'
@@ -176,7 +464,9 @@ class ScheduleDataProcessor:
         
         # Map prerequisites and corequisites using IDs
         self._map_class_dependencies(all_classes)
+        return all_classes
 
+    def _build_parameters(self, preferences: Dict) -> Dict:
         # Extract scheduling approach and parameters (support both styles)
         approach = preferences.get("approach")
         start_semester = preferences.get("startSemester")
@@ -187,6 +477,8 @@ class ScheduleDataProcessor:
         spring_credits = preferences.get("springCredits")
         major_class_limit = preferences.get("majorClassLimit")
         first_year_limits = preferences.get("firstYearLimits", {}) if limit_first_year else {}
+        # Search time in seconds for approach "optimal"
+        time_budget = preferences.get("timeBudget")
 
         scheduling_params = {
             "approach": approach,
@@ -198,30 +490,34 @@ class ScheduleDataProcessor:
             "springCredits": spring_credits,
             "majorClassLimit": major_class_limit,
             "firstYearLimits": first_year_limits,
+            "timeBudget": time_budget,
         }
 
-        logger.info(f"Processed scheduling parameters: {json.dumps(scheduling_params, indent=2)}")
+        logger.info("Processed scheduling parameters: %s", Preview(scheduling_params))
+        return scheduling_params
 
-        # Validate class data before returning
+    def _validate_parameters(self, parameters: Dict) -> Optional[str]:
+        """Return an error message if a scheduling parameter can't be used."""
+        time_budget = parameters.get("timeBudget")
+        if time_budget is not None:
+            try:
+                valid = not isinstance(time_budget, bool) and 0 < float(time_budget) < float("inf")
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                logger.error(f"Invalid timeBudget {time_budget!r}")
+                return "Invalid preferences: timeBudget must be a positive number of seconds"
+        return None
+
+    def _validate_classes(self, all_classes: Dict) -> Optional[str]:
+        """Return an error message if any class lacks a required field."""
         for cls_id, cls_info in all_classes.items():
             required_fields = ["class_name", "credits", "semesters_offered"]
             for field in required_fields:
                 if field not in cls_info:
                     logger.error(f"Missing required field {field} in class {cls_id}")
-                    return {"error": f"Invalid class data: missing {field}"}
-
-        # Add metadata to processed data
-        processed_data = {
-            "classes": all_classes,
-            "parameters": scheduling_params,
-            "metadata": {
-                "total_classes": len(all_classes),
-                "processing_timestamp": datetime.now().isoformat(),
-                "eilLevel": eil_level,
-            }
-        }
-
-        return processed_data
+                    return f"Invalid class data: missing {field}"
+        return None
     
     def _process_additional_classes(self, course: Dict, all_classes: Dict):
         """Process classes from the additional section"""
@@ -253,6 +549,7 @@ class ScheduleDataProcessor:
                     "from_course": normalized_from,
                 }
     
+    @timed("map_dependencies")
     def _map_class_dependencies(self, all_classes: Dict):
         """Map prerequisites and corequisites using class IDs"""
         for cls_id, cls_info in all_classes.items():
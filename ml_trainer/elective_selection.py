@@ -0,0 +1,204 @@
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from course_graph import term_mask
+
+
+@dataclass
+class ElectiveSection:
+    """An elective section still to satisfy: ``credits_needed`` more credits
+    from ``classes``, and ``group_counts[g]`` classes from elective group g."""
+    key: Any
+    credits_needed: int
+    classes: List[Any]
+    group_counts: Dict[Any, int] = field(default_factory=dict)
+
+
+def _requisites(cls: Dict) -> List[Any]:
+    return (cls.get("prerequisites") or []) + (cls.get("corequisites") or [])
+
+
+def _group_id(cls: Dict) -> Any:
+    group = cls.get("elective_group")
+    return group.get("id") if isinstance(group, dict) else None
+
+
+def chain_depths(classes: Dict[Any, Dict], done: Set[Any]) -> Dict[Any, Optional[int]]:
+    """Terms each class needs at least: 1 plus its longest chain of prerequisites not done.
+
+    None for a class that can never be taken: offered in no term, on a
+    prerequisite cycle, or behind either.
+    """
+    depth: Dict[Any, Optional[int]] = {}
+    on_path: Set[Any] = set()
+    for root in classes:
+        if root in depth or root in done:
+            continue
+        stack = [root]
+        while stack:
+            cid = stack[-1]
+            if cid in depth:
+                stack.pop()
+                continue
+            cls = classes[cid]
+            prereqs = [p for p in cls.get("prerequisites") or [] if p in classes and p not in done]
+            if cid not in on_path:
+                if not term_mask(cls.get("semesters_offered", [])) or any(p in on_path for p in prereqs):
+                    depth[cid] = None
+                    stack.pop()
+                    continue
+                on_path.add(cid)
+                stack.extend(p for p in prereqs if p not in depth)
+                continue
+            # Second visit: every prerequisite is resolved
+            stack.pop()
+            on_path.discard(cid)
+            below = [depth[p] for p in prereqs]
+            depth[cid] = None if None in below else 1 + max(below, default=0)
+    return depth
+
+
+def _closure(classes: Dict[Any, Dict], cid: Any, done: Set[Any]) -> Set[Any]:
+    """``cid`` plus everything it needs through prerequisites and corequisites, less ``done``."""
+    seen = {cid}
+    stack = [cid]
+    while stack:
+        for dep in _requisites(classes[stack.pop()]):
+            if dep in classes and dep not in done and dep not in seen:
+                seen.add(dep)
+                stack.append(dep)
+    return seen
+
+
+def _cheapest_cover(options: List[Tuple[Any, int, int, Any]], credits_needed: int,
+                    group_counts: Dict[Any, int]) -> Optional[List[Any]]:
+    """Fewest added credits (then fewest classes) covering a section, or None.
+
+    ``options`` are (class id, credits, added credits, group) in catalog
+    order. Memoized over (credits still needed, group counts still needed),
+    one table per option from the last back; a state the remaining options
+    can't cover even all together is cut without being filled in.
+    """
+    groups = sorted(group_counts, key=str)
+    n = len(options)
+    suffix_credits = [0] * (n + 1)
+    suffix_groups = [(0,) * len(groups)] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        group = options[i][3]
+        suffix_credits[i] = suffix_credits[i + 1] + options[i][1]
+        suffix_groups[i] = tuple(s + (g == group) for g, s in zip(groups, suffix_groups[i + 1]))
+    count_states = list(product(*(range(group_counts[g] + 1) for g in groups)))
+    done = (0,) * len(groups)
+
+    # best[(credits left, counts left)] over options i.. : (added, classes, chosen as a linked list)
+    best: Dict[Tuple, Tuple[int, int, Optional[Tuple]]] = {(0, done): (0, 0, None)}
+    for i in range(n - 1, -1, -1):
+        cid, credits, added, group = options[i]
+        slot = groups.index(group) if group in group_counts else -1
+        table = {(0, done): (0, 0, None)}
+        for counts in count_states:
+            if any(c > s for c, s in zip(counts, suffix_groups[i])):
+                continue
+            after = counts if slot < 0 or not counts[slot] else \
+                counts[:slot] + (counts[slot] - 1,) + counts[slot + 1:]
+            for left in range(min(credits_needed, suffix_credits[i]) + 1):
+                if not left and counts == done:
+                    continue
+                pick = best.get((left, counts))
+                taken = best.get((max(0, left - credits), after))
+                if taken is not None:
+                    taken = (taken[0] + added, taken[1] + 1, (cid, taken[2]))
+                    if pick is None or taken[:2] <= pick[:2]:
+                        pick = taken
+                if pick is not None:
+                    table[(left, counts)] = pick
+        best = table
+
+    found = best.get((credits_needed, tuple(group_counts[g] for g in groups)))
+    if found is None:
+        return None
+    chosen = []
+    chain = found[2]
+    while chain:
+        chosen.append(chain[0])
+        chain = chain[1]
+    return chosen
+
+
+def select_electives(classes: Dict[Any, Dict], keep: Set[Any], done: Set[Any],
+                     sections: List[ElectiveSection]) -> Set[Any]:
+    """Elective classes to take so every section is covered with the fewest semesters.
+
+    ``keep`` is what the student takes anyway (with its prerequisites) and
+    ``done`` what they completed. Semesters are estimated by their two lower
+    bounds: the longest prerequisite chain in the plan comes first, so the
+    smallest depth at which every section can still be covered caps the
+    classes considered; then the credits a choice adds, counting its own
+    prerequisites and corequisites that aren't taken anyway (within a section
+    each choice counts its own). Sections are covered in order, so
+    prerequisites one section's choice adds are free for the next.
+    A section no subset can cover (too few offered credits) keeps all its
+    classes, as before selection existed.
+    """
+    depth = chain_depths(classes, done)
+    chosen: Set[Any] = set()
+    taken = set(keep)
+    base_depth = max((depth.get(cid) or 0 for cid in keep), default=0)
+
+    # Candidates per section with the depth of their whole closure
+    candidates = []
+    for section in sections:
+        options = []
+        for cid in section.classes:
+            if cid in done:
+                continue
+            closure = _closure(classes, cid, done)
+            depths = [depth.get(j) for j in closure]
+            if None in depths:
+                continue
+            options.append((cid, max(depths), closure))
+        candidates.append(options)
+
+    # Lower bound on the plan's depth: each section's shallowest coverable cut
+    cap = base_depth
+    feasible = []
+    for section, options in zip(sections, candidates):
+        credits = 0
+        counts = dict.fromkeys(section.group_counts, 0)
+        reach = None
+        for cid, d, _ in sorted(options, key=lambda o: o[1]):
+            credits += int(classes[cid].get("credits") or 0)
+            group = _group_id(classes[cid])
+            if group in counts:
+                counts[group] += 1
+            if credits >= section.credits_needed and all(
+                    counts[g] >= need for g, need in section.group_counts.items()):
+                reach = d
+                break
+        feasible.append(reach is not None)
+        if reach is not None:
+            cap = max(cap, reach)
+
+    memo: Dict[Tuple, Optional[List[Any]]] = {}
+    for section, options, ok in zip(sections, candidates, feasible):
+        if not ok:
+            chosen.update(section.classes)
+            continue
+        rows = []
+        for cid, d, closure in options:
+            if d > cap:
+                continue
+            added = sum(int(classes[j].get("credits") or 0) for j in closure if j not in taken)
+            group = _group_id(classes[cid])
+            rows.append((cid, int(classes[cid].get("credits") or 0), added,
+                         group if group in section.group_counts else None))
+        # Programs often share an elective list; the same rows give the same cover
+        key = (section.credits_needed, tuple(sorted(section.group_counts.items(), key=str)), tuple(rows))
+        if key not in memo:
+            memo[key] = _cheapest_cover(rows, section.credits_needed, section.group_counts)
+        pick = memo[key] or []
+        chosen.update(pick)
+        for cid in pick:
+            taken.update(_closure(classes, cid, done))
+    return chosen
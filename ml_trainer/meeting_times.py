@@ -0,0 +1,131 @@
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+# A week is 7 * 1440 minutes; bit (day * MINUTES_PER_DAY + minute) is set
+# while a class meets, so two meetings overlap exactly when their masks share a bit
+MINUTES_PER_DAY = 24 * 60
+
+DAY_INDEX = {
+    "monday": 0, "mon": 0, "m": 0,
+    "tuesday": 1, "tues": 1, "tue": 1, "tu": 1, "t": 1,
+    "wednesday": 2, "wed": 2, "w": 2,
+    "thursday": 3, "thurs": 3, "thur": 3, "thu": 3, "th": 3, "r": 3,
+    "friday": 4, "fri": 4, "f": 4,
+    "saturday": 5, "sat": 5, "sa": 5, "s": 5,
+    "sunday": 6, "sun": 6, "su": 6, "u": 6,
+}
+# Compact day strings such as "MWF" or "TTh"
+_DAY_LETTERS = re.compile(r"th|tu|sa|su|[mtwrfsu]")
+_TIME = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*(?:([ap])\.?m?\.?)?$")
+_RANGE = re.compile(r"\s*(?:-|–|—|\bto\b)\s*")
+
+
+def parse_days(values: Any) -> List[int]:
+    """Day indices (Monday = 0) from names, abbreviations or compact strings; unknown entries are skipped."""
+    if isinstance(values, str):
+        values = [values]
+    days = set()
+    for value in values or []:
+        for token in re.split(r"[\s,/]+", str(value).strip().lower()):
+            if token in DAY_INDEX:
+                days.add(DAY_INDEX[token])
+            elif token and _DAY_LETTERS.sub("", token) == "":
+                days.update(DAY_INDEX[letter] for letter in _DAY_LETTERS.findall(token))
+    return sorted(days)
+
+
+def _minutes(text: str) -> Optional[Tuple[int, Optional[str]]]:
+    match = _TIME.match(text.strip().lower())
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    if hour > 24 or minute >= 60:
+        return None
+    return hour * 60 + minute, match.group(3)
+
+
+def _with_meridiem(minutes: int, meridiem: Optional[str]) -> int:
+    if meridiem is None or minutes >= 13 * 60:
+        return minutes
+    minutes %= 12 * 60
+    return minutes + 12 * 60 if meridiem == "p" else minutes
+
+
+def parse_time_range(text: Any) -> Optional[Tuple[int, int]]:
+    """(start, end) minutes after midnight from "09:00-10:30", "9-10:15am" or "1:00 PM - 2:15 PM".
+
+    A start without am/pm takes the end's, unless that would put it after
+    the end ("11-12:15pm"). None when the text isn't a time range.
+    """
+    parts = _RANGE.split(str(text).strip(), maxsplit=1)
+    if len(parts) != 2:
+        return None
+    start, end = _minutes(parts[0]), _minutes(parts[1])
+    if start is None or end is None:
+        return None
+    end_minutes = _with_meridiem(*end)
+    start_minutes = _with_meridiem(start[0], start[1] or end[1])
+    if start[1] is None and start_minutes > end_minutes:
+        start_minutes = _with_meridiem(start[0], "a")
+    if not 0 <= start_minutes < end_minutes <= MINUTES_PER_DAY:
+        return None
+    return start_minutes, end_minutes
+
+
+def meeting_options(days_offered: Any, times_offered: Any) -> Tuple[int, ...]:
+    """Weekly minute masks, one per entry of ``times_offered`` (each held on every day offered).
+
+    The entries are alternatives: a class offered "09:00-10:30, 14:00-15:30"
+    takes one of the two. Empty when either list is missing or unparseable,
+    so the class never conflicts.
+    """
+    days = parse_days(days_offered)
+    if not days or not times_offered:
+        return ()
+    if isinstance(times_offered, str):
+        times_offered = times_offered.split(",")
+    options: List[int] = []
+    for text in times_offered:
+        span = parse_time_range(text)
+        if span is None:
+            continue
+        start, end = span
+        block = (1 << (end - start)) - 1
+        mask = 0
+        for day in days:
+            mask |= block << (day * MINUTES_PER_DAY + start)
+        if mask not in options:
+            options.append(mask)
+    return tuple(options)
+
+
+def book(busy: int, meetings: Iterable[Tuple[int, ...]]) -> Optional[int]:
+    """``busy`` with a free meeting option of each course added, or None if there is none.
+
+    ``meetings`` holds each course's options (empty: no set times). Options
+    are tried in order and only revisited when a later course of the same
+    bundle has nothing left, so a course with one offered time costs a single
+    mask test: checking a bundle against a semester is linear in the bundle,
+    however full the semester is.
+    """
+    timed = [options for options in meetings if options]
+    picks = [0] * len(timed)
+    masks = [busy]
+    k = 0
+    while k < len(timed):
+        options = timed[k]
+        current = masks[-1]
+        while picks[k] < len(options) and current & options[picks[k]]:
+            picks[k] += 1
+        if picks[k] < len(options):
+            masks.append(current | options[picks[k]])
+            k += 1
+            continue
+        # Nothing left for this course: move the previous one on
+        picks[k] = 0
+        k -= 1
+        if k < 0:
+            return None
+        masks.pop()
+        picks[k] += 1
+    return masks[-1]
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# ----------------------------- Histograms -----------------------------
+
+# Seconds; scheduling stages range from microseconds to the request deadline
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CLASS_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+SEMESTER_BUCKETS = (1, 2, 4, 6, 8, 10, 12, 15, 18, 21, 24)
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by one label."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label: Optional[str] = None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        # label value -> (per-bucket counts plus a final +Inf slot, [sum])
+        self._series: Dict[Optional[str], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: Optional[str] = None) -> None:
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0] or "")
+            series = [(key, list(counts), total[0]) for key, (counts, total) in series]
+        for label_value, counts, total in series:
+            labels = f'{self.label}="{label_value}"' if self.label and label_value is not None else ""
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{_format(bound)}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "scheduler_stage_seconds", "Time spent in each request stage.", STAGE_BUCKETS, label="stage")
+CATALOG_CLASSES = Histogram(
+    "scheduler_catalog_classes", "Classes in the catalog of each generated schedule.", CLASS_BUCKETS)
+SEMESTERS_PRODUCED = Histogram(
+    "scheduler_semesters_produced", "Semesters in each generated schedule.", SEMESTER_BUCKETS)
+
+HISTOGRAMS = {h.name: h for h in (STAGE_SECONDS, CATALOG_CLASSES, SEMESTERS_PRODUCED)}
+
+# ----------------------------- Recording -----------------------------
+
+# Set while a pool worker runs a job: observations are collected here and
+# replayed by the parent process, which owns the /metrics registry
+_local = threading.local()
+
+Observation = Tuple[str, float, Optional[str]]
+
+
+def observe(histogram: Histogram, value: float, label_value: Optional[str] = None) -> None:
+    captured = getattr(_local, "captured", None)
+    if captured is not None:
+        captured.append((histogram.name, value, label_value))
+    else:
+        histogram.observe(value, label_value)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block (or, as a decorator, a call) into STAGE_SECONDS."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(STAGE_SECONDS, time.perf_counter() - start, stage)
+
+
+@contextmanager
+def capture() -> Iterator[List[Observation]]:
+    """Collect this thread's observations instead of recording them."""
+    previous = getattr(_local, "captured", None)
+    _local.captured = observations = []
+    try:
+        yield observations
+    finally:
+        _local.captured = previous
+
+
+def replay(observations: Sequence[Observation]) -> None:
+    for name, value, label_value in observations:
+        histogram = HISTOGRAMS.get(name)
+        if histogram is not None:
+            observe(histogram, value, label_value)
+
+
+def render() -> str:
+    """All histograms in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for histogram in HISTOGRAMS.values():
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+# ----------------------------- Logging -----------------------------
+
+
+class Preview:
+    """Compact JSON of a value, cut off after ``limit`` characters.
+
+    Formatted only when a log record is actually emitted, and serialization
+    stops as soon as the limit is reached, so large payloads cost little.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = 2000):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        parts: List[str] = []
+        size = 0
+        try:
+            for chunk in json.JSONEncoder(separators=(",", ":"), default=str).iterencode(self.value):
+                parts.append(chunk)
+                size += len(chunk)
+                if size > self.limit:
+                    return "".join(parts)[:self.limit] + f"... (truncated at {self.limit} chars)"
+        except (TypeError, ValueError):
+            return repr(self.value)[:self.limit]
+        return "".join(parts)
@@ -0,0 +1,458 @@
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from course_graph import CourseGraph, EIL, MAJOR, RELIGION, TERM_BITS
+from meeting_times import book
+from run_credits_simple import build_config as credits_config
+from schedule_engine import CreditCaps, Semester, next_term, run_schedule
+from schedule_rules import MajorClassLimit
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent searching when the request doesn't give a timeBudget
+DEFAULT_TIME_BUDGET = 5.0
+# Longest search a request may ask for; the inline backend has no deadline to stop it
+MAX_TIME_BUDGET = float(os.environ.get('OPTIMAL_MAX_TIME_BUDGET', 30))
+# Upper limit on the horizon when no incumbent bounds it
+MAX_TERMS = 60
+# Transposition table size limit (placed-set bitmasks)
+MAX_SEEN = 200000
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def _semester_at(semesters: List[Semester], caps: CreditCaps, t: int) -> Semester:
+    """Semester ``t`` of the calendar, extending ``semesters`` as needed."""
+    while len(semesters) <= t:
+        last = semesters[-1]
+        sem_type, year = next_term(last.type, last.year)
+        semesters.append(Semester(sem_type, year, caps.cap_for(len(semesters), sem_type)))
+    return semesters[t]
+
+# ----------------------------- Model -----------------------------
+
+
+class UnitModel:
+    """The catalog as schedulable units for the exact search.
+
+    A unit is a connected group of corequisites, which must share a semester.
+    It is offered in the terms all its members are offered in (or, if they
+    have none in common, in any member's terms: the greedy only checks the
+    bundle head). EIL courses are not units: they stay where EilPlacement put
+    them in the greedy schedule. A unit whose members' meeting times always
+    clash can't be placed.
+    """
+
+    def __init__(self, graph: CourseGraph, caps: CreditCaps, major_limit: int, fixed: Dict[int, int]):
+        n = len(graph)
+        parent = list(range(n))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        free = [i for i in range(n) if not graph.flags[i] & EIL]
+        for i in free:
+            for j in graph.coreqs(i):
+                if not graph.flags[j] & EIL:
+                    parent[find(i)] = find(j)
+
+        groups: Dict[int, List[int]] = {}
+        for i in free:
+            groups.setdefault(find(i), []).append(i)
+        units = list(groups.values())
+        unit_of = {i: u for u, members in enumerate(units) for i in members}
+
+        max_cap = max(caps.fall_winter, caps.spring)
+        self.members: List[List[int]] = []
+        self.terms: List[int] = []
+        self.credits: List[int] = []
+        self.religion: List[int] = []
+        self.majors: List[int] = []
+        self.release: List[int] = []  # earliest term allowed by fixed EIL prerequisites
+        self.meetings: List[List[Tuple[int, ...]]] = []  # meeting options of the timed members
+        prereqs: List[List[int]] = []
+        blocked: List[bool] = []
+        for members in units:
+            both = 7
+            either = 0
+            for i in members:
+                both &= graph.terms[i]
+                either |= graph.terms[i]
+            release = 0
+            deps = set()
+            bad = False
+            for i in members:
+                for p in graph.prereqs(i):
+                    if graph.flags[p] & EIL:
+                        if p in fixed:
+                            release = max(release, fixed[p] + 1)
+                        else:
+                            bad = True  # an EIL prerequisite the greedy never placed
+                    elif unit_of[p] != unit_of[i]:
+                        deps.add(unit_of[p])
+            credits = sum(graph.credits[i] for i in members)
+            religion = sum(1 for i in members if graph.flags[i] & RELIGION)
+            majors = sum(1 for i in members if graph.flags[i] & MAJOR)
+            terms = both or either
+            meetings = [graph.meetings[i] for i in members if graph.meetings[i]]
+            bad = bad or not terms or credits > max_cap or religion > 1 or majors > major_limit
+            bad = bad or book(0, meetings) is None
+            self.members.append(members)
+            self.terms.append(terms)
+            self.credits.append(credits)
+            self.religion.append(religion)
+            self.majors.append(majors)
+            self.release.append(release)
+            self.meetings.append(meetings)
+            prereqs.append(sorted(deps))
+            blocked.append(bad)
+
+        # Topological order; units on a cycle or behind a blocked unit are dropped
+        count = len(units)
+        dependents: List[List[int]] = [[] for _ in range(count)]
+        indegree = [len(p) for p in prereqs]
+        for u, ps in enumerate(prereqs):
+            for p in ps:
+                dependents[p].append(u)
+        order = [u for u in range(count) if indegree[u] == 0]
+        for u in order:
+            for d in dependents[u]:
+                indegree[d] -= 1
+                if indegree[d] == 0:
+                    order.append(d)
+        ok = [False] * count
+        for u in order:
+            ok[u] = not blocked[u] and all(ok[p] for p in prereqs[u])
+
+        self.order = [u for u in order if ok[u]]
+        self.active = ok
+        self.prereqs = prereqs
+        self.dependents = dependents
+        self.unscheduled = sorted(graph.ids[i] for u in range(count) if not ok[u] for i in units[u])
+
+        # Longest chain of dependents below each unit, for candidate ordering
+        height = [0] * count
+        for u in reversed(self.order):
+            for d in dependents[u]:
+                if ok[d]:
+                    height[u] = max(height[u], height[d] + 1)
+        self.height = height
+
+# ----------------------------- Search -----------------------------
+
+
+class OptimalSearch:
+    """Branch-and-bound over semesters for the fewest terms to place every unit.
+
+    Each level of the search picks the set of units taken in one term. Only
+    maximal sets are tried: adding a unit that fits never hurts a later term,
+    so some optimal schedule takes a maximal set in every term. A node is cut
+    when its lower bound (the offering-aware critical path of what is left,
+    and the terms needed for the remaining religion, major and credit load)
+    can't beat the incumbent, or when the same placed set was already reached
+    by an earlier term. A term's units must also get meeting times that don't
+    overlap each other or the term's fixed EIL courses.
+    """
+
+    def __init__(self, graph: CourseGraph, model: UnitModel, caps: CreditCaps, major_limit: int,
+                 semesters: List[Semester], fixed: Dict[int, int], stop_at: float):
+        self.graph = graph
+        self.model = model
+        self.caps = caps
+        self.major_limit = major_limit
+        self.semesters = semesters
+        self.stop_at = stop_at
+        self.nodes = 0
+        self.seen: Dict[int, int] = {}
+
+        self.fixed_by_term: Dict[int, List[int]] = {}
+        for i, t in fixed.items():
+            self.fixed_by_term.setdefault(t, []).append(i)
+        self.fixed_span = max(fixed.values()) + 1 if fixed else 0
+
+        m = model
+        self.candidates = sorted(m.order, key=lambda u: (-m.height[u], bin(m.terms[u]).count("1"), u))
+        self.term_of = [-1] * len(m.members)
+        self.best = float("inf")
+        self.best_terms: Optional[List[int]] = None
+
+    def semester(self, t: int) -> Semester:
+        return _semester_at(self.semesters, self.caps, t)
+
+    def term_bit(self, t: int) -> int:
+        return TERM_BITS.get(self.semester(t).type, 0)
+
+    def fixed_load(self, t: int) -> Tuple[int, int, int]:
+        credits = religion = majors = 0
+        for i in self.fixed_by_term.get(t, ()):
+            credits += self.graph.credits[i]
+            religion += 1 if self.graph.flags[i] & RELIGION else 0
+            majors += 1 if self.graph.flags[i] & MAJOR else 0
+        return credits, religion, majors
+
+    def fixed_busy(self, t: int) -> int:
+        """Weekly minutes the fixed courses of term ``t`` meet."""
+        meetings = [self.graph.meetings[i] for i in self.fixed_by_term.get(t, ())]
+        # The greedy booked them together, so they fit
+        return book(0, meetings) or 0
+
+    def lower_bound(self, t: int) -> int:
+        m = self.model
+        term_of = self.term_of
+        finish = {}
+        latest = t
+        religion = majors = credits = 0
+        for u in m.order:
+            if term_of[u] >= 0:
+                continue
+            start = max(t, m.release[u])
+            for p in m.prereqs[u]:
+                start = max(start, (term_of[p] if term_of[p] >= 0 else finish[p]) + 1)
+            # The next term (within a Fall/Winter/Spring cycle) that offers it
+            for s in range(start, start + 3):
+                if m.terms[u] & self.term_bit(s):
+                    start = s
+                    break
+            finish[u] = start
+            latest = max(latest, start)
+            religion += m.religion[u]
+            majors += m.majors[u]
+            credits += m.credits[u]
+        bound = max(latest + 1, t + religion)
+        if majors:
+            bound = max(bound, t + -(-majors // max(1, self.major_limit)))
+        s = t
+        while credits > 0 and s < MAX_TERMS:
+            credits -= self.semester(s).credit_limit - self.fixed_load(s)[0]
+            s += 1
+        return max(bound, s, self.fixed_span)
+
+    def maximal_sets(self, t: int) -> Iterator[List[int]]:
+        m = self.model
+        bit = self.term_bit(t)
+        term_of = self.term_of
+        avail = [u for u in self.candidates
+                 if term_of[u] < 0 and m.terms[u] & bit and m.release[u] <= t
+                 and all(0 <= term_of[p] < t for p in m.prereqs[u])]
+        cap = self.semester(t).credit_limit
+        limit = self.major_limit
+        base = self.fixed_load(t)
+        busy = self.fixed_busy(t) if self.graph.has_meetings else 0
+        chosen: List[int] = []
+
+        def fits(u: int, credits: int, religion: int, majors: int) -> bool:
+            if not (credits + m.credits[u] <= cap
+                    and not (m.religion[u] and religion)
+                    and majors + m.majors[u] <= limit):
+                return False
+            if not m.meetings[u]:
+                return True
+            # Book the whole set again: an earlier unit may have to take another of its times
+            meetings = [options for v in chosen for options in m.meetings[v]] + m.meetings[u]
+            return book(busy, meetings) is not None
+
+        def extend(start: int, credits: int, religion: int, majors: int) -> Iterator[List[int]]:
+            if not any(fits(u, credits, religion, majors) for u in avail if u not in chosen):
+                yield chosen
+                return
+            for k in range(start, len(avail)):
+                u = avail[k]
+                if fits(u, credits, religion, majors):
+                    chosen.append(u)
+                    yield from extend(k + 1, credits + m.credits[u], religion + m.religion[u], majors + m.majors[u])
+                    chosen.pop()
+
+        yield from extend(0, *base)
+
+    def search(self, t: int, mask: int, remaining: int, last_used: int) -> None:
+        self.nodes += 1
+        if not self.nodes & 255 and time.time() > self.stop_at:
+            raise _OutOfTime
+        if remaining == 0:
+            span = max(last_used + 1, self.fixed_span)
+            if span < self.best:
+                self.best = span
+                self.best_terms = list(self.term_of)
+            return
+        if t >= MAX_TERMS or self.lower_bound(t) >= self.best:
+            return
+        previous = self.seen.get(mask)
+        if previous is not None and previous <= t:
+            return
+        if len(self.seen) < MAX_SEEN:
+            self.seen[mask] = t
+
+        for chosen in self.maximal_sets(t):
+            taken = list(chosen)
+            for u in taken:
+                self.term_of[u] = t
+            bits = 0
+            for u in taken:
+                bits |= 1 << u
+            self.search(t + 1, mask | bits, remaining - len(taken), t if taken else last_used)
+            for u in taken:
+                self.term_of[u] = -1
+
+    def run(self, incumbent: Optional[List[int]], bound: float = float("inf")) -> bool:
+        """Search from scratch for fewer than ``bound`` terms; returns True if the whole tree was explored."""
+        self.best = bound
+        if incumbent is not None:
+            placed = [t for t in incumbent if t >= 0]
+            self.best = min(bound, max(max(placed) + 1 if placed else 0, self.fixed_span))
+            self.best_terms = incumbent
+        try:
+            self.search(0, 0, len(self.model.order), -1)
+            return True
+        except _OutOfTime:
+            return False
+
+# ----------------------------- Greedy seed -----------------------------
+
+
+def _term_index(semesters: List[Semester], caps: CreditCaps, sem_type: str, year: int) -> int:
+    for t in range(MAX_TERMS):
+        sem = _semester_at(semesters, caps, t)
+        if sem.type == sem_type and sem.year == year:
+            return t
+    return -1
+
+
+def _greedy_terms(graph: CourseGraph, schedule: List[Dict], semesters: List[Semester],
+                  caps: CreditCaps) -> Dict[int, int]:
+    """Term index of each course's first appearance in a greedy schedule."""
+    placed: Dict[int, int] = {}
+    for sem in schedule:
+        t = _term_index(semesters, caps, sem["type"], sem["year"])
+        for cls in sem["classes"]:
+            i = graph.index_of(cls["id"])
+            if i is not None and i not in placed:
+                placed[i] = t
+    return placed
+
+
+def _as_incumbent(search: OptimalSearch, placed: Dict[int, int]) -> Optional[List[int]]:
+    """The greedy placement as unit terms, or None if it breaks a rule the search enforces."""
+    m = search.model
+    term_of = [-1] * len(m.members)
+    for u in m.order:
+        terms = {placed.get(i, -1) for i in m.members[u]}
+        if len(terms) != 1 or -1 in terms:
+            return None
+        t = terms.pop()
+        if not m.terms[u] & search.term_bit(t) or t < m.release[u]:
+            return None
+        if any(term_of[p] >= t for p in m.prereqs[u]):
+            return None
+        term_of[u] = t
+    loads: Dict[int, List[int]] = {}
+    for u in m.order:
+        load = loads.setdefault(term_of[u], list(search.fixed_load(term_of[u])))
+        load[0] += m.credits[u]
+        load[1] += m.religion[u]
+        load[2] += m.majors[u]
+    for t, (credits, religion, majors) in loads.items():
+        if credits > search.semester(t).credit_limit or religion > 1 or majors > search.major_limit:
+            return None
+    return term_of
+
+# ----------------------------- Entry point -----------------------------
+
+
+def create_schedule(processed: Dict, graph: Optional[CourseGraph] = None, deadline: Optional[float] = None,
+                    progress: Optional[Callable[[int], None]] = None) -> Dict:
+    """Fewest-semester schedule under the credits-based rules, within a time budget.
+
+    Unlike the greedy, a prerequisite has to be finished in an earlier term
+    (not earlier in the same one). The greedy schedule is the starting
+    incumbent and is returned unchanged when the search can't beat it.
+    "optimal" is only set when the returned schedule is the one the search
+    proved shortest: the greedy itself usually puts a prerequisite in the
+    same term as its course, which the search doesn't allow, so the greedy
+    then only bounds the search.
+    """
+    params = processed["parameters"]
+    graph = graph if graph is not None else CourseGraph.from_processed(processed)
+    started = time.time()
+    budget = min(float(params.get("timeBudget") or DEFAULT_TIME_BUDGET), MAX_TIME_BUDGET)
+    stop_at = started + budget if deadline is None else min(started + budget, deadline)
+
+    config = credits_config(params)
+    caps = config.caps
+    major_limit = next(r.limit for r in config.rules if isinstance(r, MajorClassLimit))
+    greedy = run_schedule(processed, config, graph, deadline)
+
+    start_semester = params.get("startSemester") or "Fall 2025"
+    semesters = config.horizon.build(start_semester, caps, 1)
+    placed = _greedy_terms(graph, greedy["schedule"], semesters, caps)
+    # EIL courses keep the terms EilPlacement gave them
+    fixed = {i: t for i, t in placed.items() if graph.flags[i] & EIL}
+
+    model = UnitModel(graph, caps, major_limit, fixed)
+    search = OptimalSearch(graph, model, caps, major_limit, semesters, fixed, stop_at)
+    incumbent = _as_incumbent(search, placed)
+    greedy_span = max(placed.values()) + 1 if placed else 0
+    root_bound = search.lower_bound(0)
+    covered = set(fixed)
+    for u in model.order:
+        covered.update(model.members[u])
+    if placed.keys() <= covered:
+        # Only a schedule shorter than the greedy's replaces it
+        proven = search.run(incumbent, greedy_span)
+    else:
+        # The greedy managed a course the unit model can't place; a shorter
+        # schedule without it wouldn't be better
+        proven = False
+    improved = search.best_terms is not None and search.best_terms is not incumbent and search.best < greedy_span
+    logger.info(f"Optimal search: {search.nodes} nodes, span {search.best} "
+                f"(greedy {greedy_span}, bound {root_bound}), {'proven' if proven else 'time budget reached'}")
+
+    if improved:
+        schedule = _emit(search, search.best_terms, fixed)
+    else:
+        schedule = greedy["schedule"]
+    if progress is not None:
+        progress(len(schedule))
+
+    metadata = {
+        "approach": "optimal",
+        "startSemester": start_semester,
+        "eilLevel": params.get("eilLevel"),
+        "optimal": proven and (improved or incumbent is not None),
+        "semesterSpan": search.best if improved else greedy_span,
+        "greedySemesterSpan": greedy_span,
+        "lowerBound": root_bound,
+        "searchNodes": search.nodes,
+        "timeBudget": budget,
+        "unscheduled": model.unscheduled,
+        "generatedAt": datetime.now().isoformat(),
+    }
+    return {"metadata": metadata, "schedule": schedule}
+
+
+def _emit(search: OptimalSearch, term_of: List[int], fixed: Dict[int, int]) -> List[Dict]:
+    graph = search.graph
+    by_term: Dict[int, List[int]] = {}
+    for i, t in sorted(fixed.items(), key=lambda item: item[0]):
+        by_term.setdefault(t, []).append(i)
+    for u in search.candidates:
+        if term_of[u] >= 0:
+            by_term.setdefault(term_of[u], []).extend(search.model.members[u])
+    schedule = []
+    for t in sorted(by_term):
+        sem = search.semester(t)
+        courses = by_term[t]
+        schedule.append({
+            "type": sem.type,
+            "year": sem.year,
+            "classes": [graph.course_dict(i) for i in courses],
+            "totalCredits": sum(graph.credits[i] for i in courses)
+        })
+    return schedule
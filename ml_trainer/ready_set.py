@@ -0,0 +1,120 @@
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from course_graph import CourseGraph, TERM_BITS, bitset
+from vector_ops import ready_rows, row_lengths
+
+TERMS = ("Fall", "Winter", "Spring")
+
+
+class ReadySet:
+    """Kahn-style frontier for the greedy schedulers.
+
+    Tracks how many prerequisites of each course are still unplaced and keeps
+    one heap per term (Fall/Winter/Spring) of the courses whose prerequisites
+    are all placed, ordered by ``rank`` (lower rank is visited first). A course
+    enters the heaps only when its last prerequisite is placed, so a semester
+    sweep only touches courses that could actually be taken.
+
+    The placed and released sets are mirrored as int bitmasks, so whether a
+    term has anything eligible at all is one bitwise expression against the
+    catalog's term offering sets.
+    """
+
+    def __init__(self,
+                 graph: CourseGraph,
+                 rank: Sequence[int],
+                 members: Iterable[int]):
+        n = len(graph)
+        self.graph = graph
+        self.rank = rank
+        by_mask = [tuple(t for t in TERMS if mask & TERM_BITS[t]) for mask in range(8)]
+        self.terms: List[Tuple[str, ...]] = [by_mask[mask] for mask in graph.terms]
+        self.unmet: List[int] = row_lengths(graph.prereq_offsets)
+        self.placed = bytearray(n)
+        self.member = bytearray(n)
+        self.heaps: Dict[str, List[Tuple[int, int]]] = {t: [] for t in TERMS}
+        self.placed_mask = 0
+
+        # State of the sweep in progress, if any
+        self._term: Optional[str] = None
+        self._cursor = -1
+        self._deferred: List[Tuple[int, int]] = []
+
+        for i in members:
+            self.member[i] = 1
+        self.remaining = self.member.count(1)
+        ready = ready_rows(self.unmet, self.member)
+        # (rank, index) items are unique, so heapifying gives the same pop
+        # order as pushing them one at a time
+        for i in ready:
+            item = (rank[i], i)
+            for t in self.terms[i]:
+                self.heaps[t].append(item)
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+        self.ready_mask = bitset(ready, n)
+
+    def is_placed(self, i: int) -> bool:
+        return bool(self.placed[i])
+
+    def place(self, i: int) -> None:
+        """Mark a course placed and release dependents whose last prerequisite it was."""
+        if self.placed[i]:
+            return
+        self.placed[i] = 1
+        self.placed_mask |= 1 << i
+        if self.member[i]:
+            self.remaining -= 1
+        graph = self.graph
+        for k in range(graph.dependent_offsets[i], graph.dependent_offsets[i + 1]):
+            d = graph.dependent_targets[k]
+            self.unmet[d] -= 1
+            if self.unmet[d] == 0 and self.member[d] and not self.placed[d]:
+                self.ready_mask |= 1 << d
+                self._push(d)
+
+    def eligible(self, term: str) -> int:
+        """Bitmask of unplaced courses offered in ``term`` whose prerequisites are all placed."""
+        return self.ready_mask & self.graph.term_sets.get(term, 0) & ~self.placed_mask
+
+    def _push(self, i: int) -> None:
+        item = (self.rank[i], i)
+        for t in self.terms[i]:
+            if t == self._term and item[0] < self._cursor:
+                # Already passed it in this sweep; it becomes visible next sweep
+                self._deferred.append(item)
+            else:
+                heapq.heappush(self.heaps[t], item)
+
+    def sweep(self, term: str, visit: Callable[[int], bool]) -> None:
+        """Visit ready, unplaced courses offered in ``term`` in rank order.
+
+        Courses released during the sweep are visited too when they rank after
+        the current one, matching a single pass over the sorted course list.
+        ``visit`` returns False to end the sweep early (e.g. semester full).
+        """
+        heap = self.heaps.get(term)
+        if heap is None or not self.eligible(term):
+            return
+        passed: List[Tuple[int, int]] = []
+        self._term = term
+        self._deferred = []
+        try:
+            while heap:
+                item = heapq.heappop(heap)
+                i = item[1]
+                if self.placed[i]:
+                    continue
+                self._cursor = item[0]
+                keep_going = visit(i)
+                if not self.placed[i]:
+                    passed.append(item)
+                if not keep_going:
+                    break
+        finally:
+            self._term = None
+            self._cursor = -1
+            for item in passed + self._deferred:
+                heapq.heappush(heap, item)
+            self._deferred = []
@@ -0,0 +1,81 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from schedule_cache import LRUCache
+
+
+# Compact JSON with sorted keys: the bytes jsonify writes outside debug mode.
+# One shared encoder saves building a new one per call.
+dumps = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+
+
+def encode_object(fields: Dict[str, str]) -> str:
+    """A JSON object from member values that are already encoded."""
+    return "{" + ",".join(f"{dumps(key)}:{fields[key]}" for key in sorted(fields)) + "}"
+
+
+class ResponseEncoder:
+    """Encodes schedule responses from cached per-course JSON fragments.
+
+    A course dict comes out of CourseGraph.course_dict the same way every
+    time for a given catalog, so its encoded JSON is kept per catalog id and
+    responses are assembled by concatenation instead of re-encoding every
+    placed course. The output matches jsonify's.
+
+    The compact shape lists class ids per semester and every scheduled class
+    once, in a "classes" table keyed by id.
+    """
+
+    def __init__(self, max_catalogs: int = 64, ttl_seconds: float = 86400.0):
+        self._tables = LRUCache(max_entries=max_catalogs, ttl_seconds=ttl_seconds)
+
+    def _table(self, catalog_id: Optional[str]) -> Optional[Dict[Any, str]]:
+        if catalog_id is None:
+            return None
+        table = self._tables.get(catalog_id)
+        if table is None:
+            table = {}
+            self._tables.put(catalog_id, table)
+        return table
+
+    def encode(self, result: Dict, catalog_id: Optional[str] = None, compact: bool = False,
+               extra: Optional[Dict] = None) -> str:
+        """The JSON for {"metadata", "schedule", **extra} (plus "classes" if compact).
+
+        Semesters locked by /reschedule (metadata "lockedSemesters") were sent
+        by the client, so their classes are encoded as given, not from the
+        catalog's fragments.
+        """
+        metadata = result.get("metadata", {})
+        table = self._table(catalog_id)
+        verbatim = metadata.get("lockedSemesters") or 0
+        classes: Dict[str, str] = {}
+        semesters: List[str] = []
+        for n, sem in enumerate(result.get("schedule", [])):
+            ids = []
+            fragments = []
+            for course in sem.get("classes", []):
+                cid = course.get("id")
+                fragment = table.get(cid) if table is not None and n >= verbatim else None
+                if fragment is None:
+                    fragment = dumps(course)
+                    if table is not None and n >= verbatim:
+                        table[cid] = fragment
+                if compact:
+                    ids.append(cid)
+                    classes.setdefault(str(cid), fragment)
+                else:
+                    fragments.append(fragment)
+            fields = {key: dumps(value) for key, value in sem.items() if key != "classes"}
+            fields["classes"] = dumps(ids) if compact else "[" + ",".join(fragments) + "]"
+            semesters.append(encode_object(fields))
+
+        fields = {key: dumps(value) for key, value in (extra or {}).items()}
+        fields["metadata"] = dumps(metadata)
+        fields["schedule"] = "[" + ",".join(semesters) + "]"
+        if compact:
+            fields["classes"] = encode_object(classes)
+        return encode_object(fields)
+
+    def stats(self) -> Dict:
+        return self._tables.stats()
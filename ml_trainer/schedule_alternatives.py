@@ -0,0 +1,95 @@
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Most alternatives one request may ask for
+ALTERNATIVES_MAX = int(os.environ.get('ALTERNATIVES_MAX', 10))
+# Variants scheduled per alternative requested; duplicates are common on
+# small catalogs, so more candidates than results are run
+ALTERNATIVE_RUNS = int(os.environ.get('ALTERNATIVE_RUNS', 2))
+
+
+def variant_processed(processed: Dict, variant: int) -> Dict:
+    """The processed payload with its priority order perturbed by ``variant``.
+
+    Variant 0 is the ordinary schedule (see schedule_engine.variant_rank).
+    """
+    if not variant:
+        return processed
+    return {**processed, "parameters": {**processed["parameters"], "variant": variant}}
+
+
+def fingerprint(result: Dict) -> Tuple:
+    """Which classes land in which semester; equal for equivalent plans."""
+    return tuple(
+        (sem.get("type"), sem.get("year"), tuple(sorted(c.get("id") for c in sem.get("classes", []))))
+        for sem in result.get("schedule", [])
+    )
+
+
+def score(result: Dict) -> Tuple[int, int, int]:
+    """Sort key for a schedule; lower is better.
+
+    Classes left out (a horizon that ran out) count first, then semesters
+    to graduate, then the credit spread between the heaviest and lightest
+    term.
+    """
+    schedule = result.get("schedule", [])
+    placed = sum(len(sem.get("classes", [])) for sem in schedule)
+    credits = [sem.get("totalCredits", 0) for sem in schedule]
+    return -placed, len(credits), (max(credits) - min(credits)) if credits else 0
+
+
+def best_alternatives(results: Iterable[Tuple[int, Dict]], count: int) -> List[Tuple[int, Dict]]:
+    """The ``count`` best distinct (variant, result) pairs, best first.
+
+    Equal scores keep variant order, so the ordinary schedule leads its ties.
+    """
+    ranked = sorted(results, key=lambda item: (score(item[1]), item[0]))
+    seen = set()
+    picked = []
+    for variant, result in ranked:
+        key = fingerprint(result)
+        if key in seen:
+            continue
+        seen.add(key)
+        picked.append((variant, result))
+        if len(picked) == count:
+            break
+    return picked
+
+
+def candidate_variants(count: int) -> range:
+    """The variants scheduled for ``count`` alternatives."""
+    return range(max(1, count * ALTERNATIVE_RUNS))
+
+
+def schedule_alternatives(processed: Dict, count: int,
+                          run: Callable[[Dict], Optional[Dict]],
+                          map_fn: Callable = map) -> Tuple[List[Tuple[int, Dict]], int]:
+    """Schedule ``count * ALTERNATIVE_RUNS`` variants and keep the best distinct ones.
+
+    ``run`` schedules one processed payload and returns None when it failed
+    or timed out; ``map_fn`` lets the caller run the variants concurrently.
+    Returns the picked (variant, result) pairs and the number of variants run.
+    """
+    variants = candidate_variants(count)
+    results = map_fn(lambda v: (v, run(variant_processed(processed, v))), variants)
+    finished = [(v, result) for v, result in results if result is not None]
+    return best_alternatives(finished, count), len(variants)
+
+
+def cached_alternatives(count: int,
+                        lookup: Callable[[int], Optional[Dict]]) -> Optional[Tuple[List[Tuple[int, Dict]], int]]:
+    """schedule_alternatives' answer from already stored results, or None.
+
+    ``lookup`` returns a variant's stored result; only when every variant
+    has one is the payload answered without processing it.
+    """
+    variants = candidate_variants(count)
+    finished = []
+    for v in variants:
+        result = lookup(v)
+        if result is None:
+            return None
+        finished.append((v, result))
+    return best_alternatives(finished, count), len(variants)
@@ -0,0 +1,492 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from catalog_file import catalog_files
+from course_graph import CourseGraph
+from metrics import capture, replay
+from optimal_solver import create_schedule as optimal_schedule
+from run_credits_simple import build_config as credits_config
+from run_semester_simple import build_config as semester_config
+from schedule_cache import LRUCache
+from schedule_jobs import Progress
+from schedule_engine import CreditCaps, Planner, ScheduleTimeout, result_records
+from schedule_rules import FrozenPrefix
+
+logger = logging.getLogger(__name__)
+
+# Compiled catalogs shared through memory-mapped files (CATALOG_FILE_DIR);
+# None keeps each process compiling its own
+CATALOG_FILES = catalog_files()
+
+# Scheduling approaches -> rule configuration builders.
+# Support both spellings: 'semester-based' (preferred) and 'semesters-based' (legacy)
+APPROACH_CONFIGS = {
+    "credits-based": credits_config,
+    "semester-based": semester_config,
+    "semesters-based": semester_config,
+}
+
+# Approaches that run their own solver instead of a rule configuration
+APPROACH_SOLVERS = {
+    "optimal": optimal_schedule,
+}
+
+
+def credit_caps(parameters: Dict) -> CreditCaps:
+    """The credit caps a request's approach schedules under."""
+    approach = parameters.get("approach", "credits-based")
+    return APPROACH_CONFIGS.get(approach, credits_config)(parameters).caps
+
+
+def _solver(parameters: Dict) -> Optional[Callable[..., Dict]]:
+    """The solver for the parameters' approach, or None for a rule configuration."""
+    approach = parameters.get("approach", "credits-based")
+    solver = APPROACH_SOLVERS.get(approach)
+    # Solvers plan from scratch: they can't keep locked semesters or dropped classes
+    if solver is not None and (parameters.get("lockedSchedule") or parameters.get("dropped")):
+        raise ValueError(f"Rescheduling isn't supported for approach '{approach}'")
+    return solver
+
+
+def _planner(processed_data: Dict, graph: Optional[CourseGraph], deadline: Optional[float],
+             progress: Optional[Callable[[int], None]]) -> Planner:
+    # Unknown or missing approaches fall back to credits-based
+    approach = processed_data["parameters"].get("approach", "credits-based")
+    build_config = APPROACH_CONFIGS.get(approach, credits_config)
+    parameters = processed_data["parameters"]
+    config = build_config(parameters)
+    # /generate-alternatives: a perturbed priority order per variant
+    config.variant = parameters.get("variant") or 0
+    # /reschedule: keep the locked semesters and only schedule what follows
+    if parameters.get("lockedSchedule") or parameters.get("dropped"):
+        config.rules.insert(0, FrozenPrefix(parameters.get("lockedSchedule") or [], parameters.get("dropped") or []))
+    return Planner(processed_data, config, graph, deadline, progress)
+
+
+def schedule_processed(processed_data: Dict, graph: Optional[CourseGraph] = None,
+                       deadline: Optional[float] = None,
+                       progress: Optional[Callable[[int], None]] = None) -> Dict:
+    """Run the scheduler configured by the processed parameters' approach"""
+    # Determine which optimizer to use based on approach
+    approach = (processed_data.get("parameters") or {}).get("approach", "credits-based")
+    logger.info(f"Using scheduling approach: {approach}")
+
+    solver = _solver(processed_data.get("parameters") or {})
+    if solver is not None:
+        return solver(processed_data, graph, deadline, progress)
+    return _planner(processed_data, graph, deadline, progress).run()
+
+
+def stream_processed(processed_data: Dict, graph: Optional[CourseGraph] = None,
+                     deadline: Optional[float] = None) -> Iterator[Dict]:
+    """schedule_processed as stream records (see Planner.stream).
+
+    Solver approaches only have a result at the end, so their semesters all
+    arrive at once.
+    """
+    approach = (processed_data.get("parameters") or {}).get("approach", "credits-based")
+    logger.info(f"Streaming scheduling approach: {approach}")
+
+    solver = _solver(processed_data.get("parameters") or {})
+    if solver is not None:
+        yield from result_records(solver(processed_data, graph, deadline, None))
+        return
+    yield from _planner(processed_data, graph, deadline, None).stream()
+
+# ----------------------------- Worker side -----------------------------
+
+# Compiled catalogs held by a pool worker between jobs, keyed by catalog id
+_worker_catalogs: Optional[LRUCache] = None
+# When each job in flight was picked up, by job slot (see ProcessBackend); 0 while queued
+_job_started: Any = None
+
+
+def _init_worker(max_catalogs: int, started: Any) -> None:
+    global _worker_catalogs, _job_started
+    _worker_catalogs = LRUCache(max_entries=max_catalogs, ttl_seconds=float("inf"))
+    _job_started = started
+
+
+def _warm() -> int:
+    return os.getpid()
+
+
+def _job(slot: int, budget: Optional[float], run: Callable[..., Any], *args) -> Any:
+    """Call ``run(*args, deadline)`` with the deadline ``budget`` seconds from now.
+
+    Time spent queued for a worker doesn't count; the start is stamped in the
+    job's slot so the parent can tell a queued job from a running one.
+    """
+    now = time.time()
+    _job_started[slot] = now
+    return run(*args, None if budget is None else now + budget)
+
+
+def _reporter(progress: Any) -> Optional[Callable[[int], None]]:
+    # Progress objects only need a writable ``value``
+    if progress is None:
+        return None
+
+    def report(semesters: int) -> None:
+        progress.value = semesters
+    return report
+
+
+def _worker_graph(catalog_id: str) -> Optional[CourseGraph]:
+    # A catalog this worker holds, or one another process already wrote
+    graph = _worker_catalogs.get(catalog_id)
+    if graph is None and CATALOG_FILES is not None:
+        graph = CATALOG_FILES.load(catalog_id)
+        if graph is not None:
+            _worker_catalogs.put(catalog_id, graph)
+    return graph
+
+
+def _run_in_worker(catalog_id: str, parameters: Dict, classes: Optional[Dict], progress: Any,
+                   deadline: Optional[float]) -> Optional[Tuple[Dict, List]]:
+    """Schedule against a catalog this worker has compiled (or mapped).
+
+    Returns the result with the stage timings recorded while producing it, or
+    None when the worker doesn't hold the catalog and no classes were sent;
+    the caller then resends the job with the classes attached.
+    """
+    graph = _worker_graph(catalog_id)
+    if graph is None and classes is None:
+        return None
+    with capture() as observations:
+        if graph is None:
+            graph = _compile(catalog_id, classes)
+        result = schedule_processed({"parameters": parameters}, graph, deadline, _reporter(progress))
+    return result, observations
+
+
+def _compile(catalog_id: str, classes: Dict) -> CourseGraph:
+    if CATALOG_FILES is not None:
+        graph = CATALOG_FILES.graph(catalog_id, classes)
+    else:
+        graph = CourseGraph.from_processed({"classes": classes})
+    _worker_catalogs.put(catalog_id, graph)
+    return graph
+
+
+def _stream_in_worker(catalog_id: str, parameters: Dict, classes: Optional[Dict], channel: Any,
+                      deadline: Optional[float]) -> None:
+    """Put a job's stream records on ``channel`` (a manager queue) as they come.
+
+    Each item is ("record", record); the last one is ("done", observations),
+    ("error", exception) or, when the worker doesn't hold the catalog and no
+    classes were sent, ("miss", None).
+    """
+    graph = _worker_graph(catalog_id)
+    if graph is None and classes is None:
+        channel.put(("miss", None))
+        return
+    try:
+        with capture() as observations:
+            if graph is None:
+                graph = _compile(catalog_id, classes)
+            for record in stream_processed({"parameters": parameters}, graph, deadline):
+                channel.put(("record", record))
+    except Exception as e:
+        channel.put(("error", e))
+        return
+    channel.put(("done", observations))
+
+# ----------------------------- Backends -----------------------------
+
+# How often a request checks on its job while waiting for it (or for its next record)
+POLL_SECONDS = 0.5
+# Jobs in flight at once on a process backend; more requests wait for a slot
+JOB_SLOTS = 1024
+
+
+class InlineBackend:
+    """Schedule on the calling thread."""
+
+    name = "inline"
+
+    def __init__(self, deadline_seconds: float = 0):
+        self.deadline_seconds = deadline_seconds
+        self.timeouts = 0
+
+    def deadline(self) -> Optional[float]:
+        return time.time() + self.deadline_seconds if self.deadline_seconds > 0 else None
+
+    def progress_channel(self) -> Any:
+        """Object whose ``value`` a running job updates with semesters placed."""
+        return Progress()
+
+    def _graph(self, catalog_id: str, processed: Dict, graph: Optional[CourseGraph]) -> Optional[CourseGraph]:
+        if graph is None and CATALOG_FILES is not None:
+            graph = CATALOG_FILES.graph(catalog_id, processed["classes"])
+        return graph
+
+    def run(self, catalog_id: str, processed: Dict, graph: Optional[CourseGraph] = None,
+            progress: Any = None) -> Dict:
+        graph = self._graph(catalog_id, processed, graph)
+        try:
+            return schedule_processed(processed, graph, self.deadline(), _reporter(progress))
+        except ScheduleTimeout:
+            self.timeouts += 1
+            raise
+
+    def stream(self, catalog_id: str, processed: Dict, graph: Optional[CourseGraph] = None) -> Iterator[Dict]:
+        """Stream records (see Planner.stream) for a schedule as it is built."""
+        graph = self._graph(catalog_id, processed, graph)
+        try:
+            yield from stream_processed(processed, graph, self.deadline())
+        except ScheduleTimeout:
+            self.timeouts += 1
+            raise
+
+    def stats(self) -> Dict:
+        stats = {
+            "backend": self.name,
+            "deadline_seconds": self.deadline_seconds,
+            "timeouts": self.timeouts,
+        }
+        if CATALOG_FILES is not None:
+            stats["catalog_files"] = CATALOG_FILES.stats()
+        return stats
+
+    def start(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ProcessBackend(InlineBackend):
+    """Schedule on a pool of warm worker processes.
+
+    Workers import the scheduler once at start-up and keep the catalogs they
+    compile, so a job only ships the catalog id and parameters; the classes go
+    along only when the worker that picked the job up hasn't seen the catalog.
+    A job's deadline starts when a worker picks it up and is checked
+    cooperatively by the engine between semesters. A job still queued when
+    its whole deadline has passed is cancelled; one still running
+    ``grace_seconds`` past its deadline has its pool torn down.
+    """
+
+    name = "process"
+
+    def __init__(self, workers: int, deadline_seconds: float = 0, worker_catalogs: int = 16,
+                 start_method: str = "spawn", grace_seconds: float = 2.0):
+        super().__init__(deadline_seconds)
+        self.workers = max(1, int(workers))
+        self.worker_catalogs = worker_catalogs
+        self.start_method = start_method
+        self.grace_seconds = grace_seconds
+        self.catalog_misses = 0
+        self.restarts = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Start times the workers stamp, one slot per job in flight (see _job)
+        self._started: Any = None
+        self._slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(JOB_SLOTS):
+            self._slots.put(slot)
+        self._manager = None
+
+    def budget(self) -> Optional[float]:
+        return self.deadline_seconds if self.deadline_seconds > 0 else None
+
+    def start(self) -> ProcessPoolExecutor:
+        return self._pool()[0]
+
+    def _pool(self) -> Tuple[ProcessPoolExecutor, Any]:
+        with self._lock:
+            if self._executor is None:
+                self._executor, self._started = self._start()
+            return self._executor, self._started
+
+    def _start(self) -> Tuple[ProcessPoolExecutor, Any]:
+        context = multiprocessing.get_context(self.start_method)
+        started = context.RawArray("d", JOB_SLOTS)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.worker_catalogs, started),
+        )
+        # Start every worker now rather than on the first requests
+        for _ in range(self.workers):
+            executor.submit(_warm)
+        return executor, started
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return  # another thread already replaced it
+            # A running job can't be cancelled through the executor, so stop
+            # its processes directly
+            for process in list((getattr(broken, "_processes", None) or {}).values()):
+                process.terminate()
+            broken.shutdown(wait=False)
+            self._executor, self._started = self._start()
+            self.restarts += 1
+
+    def _submit(self, slot: int, budget: Optional[float], run: Callable[..., Any], *args) -> Tuple[Any, Any, Any]:
+        executor, started = self._pool()
+        started[slot] = 0.0
+        return executor, started, executor.submit(_job, slot, budget, run, *args)
+
+    def _check(self, executor: ProcessPoolExecutor, started: Any, future: Any, slot: int,
+               budget: Optional[float], submitted: float) -> None:
+        """Raise ScheduleTimeout for a job past its deadline.
+
+        A job still queued is cancelled once the request's whole deadline has
+        gone by; the other jobs are left alone. Only a job running past its
+        deadline takes the pool (and the jobs on it) down.
+        """
+        if budget is None:
+            return
+        now = time.time()
+        begun = started[slot]
+        if not begun:
+            if now > submitted + budget and future.cancel():
+                logger.warning("Scheduling job waited past its deadline for a worker; cancelled it")
+                self.cancelled += 1
+                raise ScheduleTimeout("Schedule generation exceeded its deadline")
+        elif now > begun + budget + self.grace_seconds:
+            logger.error("Scheduling job ignored its deadline; restarting the worker pool")
+            self._restart(executor)
+            raise ScheduleTimeout("Schedule generation exceeded its deadline")
+
+    def _shared(self) -> Any:
+        # Workers are separate processes, so progress and streamed records
+        # go through a manager
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context(self.start_method).Manager()
+            return self._manager
+
+    def progress_channel(self) -> Any:
+        return self._shared().Value("i", 0)
+
+    def _call(self, budget: Optional[float], run: Callable[..., Any], *args) -> Any:
+        """``run(*args, deadline)`` on a worker; see _check for the deadline."""
+        slot = self._slots.get()
+        try:
+            submitted = time.time()
+            for attempt in range(2):
+                executor, started, future = self._submit(slot, budget, run, *args)
+                try:
+                    while True:
+                        try:
+                            return future.result(timeout=POLL_SECONDS)
+                        except FutureTimeout:
+                            self._check(executor, started, future, slot, budget, submitted)
+                except BrokenProcessPool:
+                    # Collateral of another job's restart (or a crashed worker): retry once
+                    self._restart(executor)
+                    if attempt or (budget is not None and time.time() > submitted + budget):
+                        raise
+            return None
+        finally:
+            self._slots.put(slot)
+
+    def run(self, catalog_id: str, processed: Dict, graph: Optional[CourseGraph] = None,
+            progress: Any = None) -> Dict:
+        budget = self.budget()
+        parameters = processed["parameters"]
+        try:
+            outcome = self._call(budget, _run_in_worker, catalog_id, parameters, None, progress)
+            if outcome is None:
+                self.catalog_misses += 1
+                outcome = self._call(budget, _run_in_worker, catalog_id, parameters, processed["classes"], progress)
+            result, observations = outcome
+            replay(observations)
+            return result
+        except ScheduleTimeout:
+            self.timeouts += 1
+            raise
+
+    def stream(self, catalog_id: str, processed: Dict, graph: Optional[CourseGraph] = None) -> Iterator[Dict]:
+        budget = self.budget()
+        channel = self._shared().Queue()
+        classes = None
+        slot = self._slots.get()
+        try:
+            submitted = time.time()
+            while True:
+                executor, started, future = self._submit(
+                    slot, budget, _stream_in_worker, catalog_id, processed["parameters"], classes, channel)
+                while True:
+                    try:
+                        kind, value = channel.get(timeout=POLL_SECONDS)
+                    except queue.Empty:
+                        if future.done() and not future.cancelled() and future.exception() is not None:
+                            # The worker died before it could report; see _call
+                            self._restart(executor)
+                            raise future.exception()
+                        try:
+                            self._check(executor, started, future, slot, budget, submitted)
+                        except ScheduleTimeout:
+                            self.timeouts += 1
+                            raise
+                        continue
+                    if kind == "record":
+                        yield value
+                    elif kind == "miss":
+                        self.catalog_misses += 1
+                        classes = processed["classes"]
+                        break
+                    elif kind == "error":
+                        if isinstance(value, ScheduleTimeout):
+                            self.timeouts += 1
+                        raise value
+                    else:
+                        replay(value)
+                        return
+        finally:
+            self._slots.put(slot)
+
+    def stats(self) -> Dict:
+        return {
+            **super().stats(),
+            "workers": self.workers,
+            "worker_catalogs": self.worker_catalogs,
+            "catalog_misses": self.catalog_misses,
+            "cancelled": self.cancelled,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = self._started = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+
+def create_backend() -> InlineBackend:
+    """Build the backend selected by SCHEDULER_BACKEND (``process`` or ``inline``)."""
+    deadline_seconds = float(os.environ.get('SCHEDULE_DEADLINE_SECONDS', 25))
+    kind = os.environ.get('SCHEDULER_BACKEND', 'process').lower()
+    if kind == "inline":
+        return InlineBackend(deadline_seconds)
+    if kind != "process":
+        logger.warning(f"Unknown SCHEDULER_BACKEND '{kind}', using process")
+    backend = ProcessBackend(
+        workers=int(os.environ.get('SCHEDULER_WORKERS', os.cpu_count() or 1)),
+        deadline_seconds=deadline_seconds,
+        worker_catalogs=int(os.environ.get('SCHEDULER_WORKER_CATALOGS', 16)),
+        start_method=os.environ.get('SCHEDULER_START_METHOD', 'spawn'),
+    )
+    # Spawned workers re-import the main module (``python api.py`` makes it
+    # __mp_main__) before parent_process() is set, so check the name: only
+    # the main process starts a pool now. Otherwise run/stream start it.
+    if multiprocessing.current_process().name == "MainProcess":
+        backend.start()
+    return backend
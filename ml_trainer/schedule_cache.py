@@ -0,0 +1,158 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Class fields that can influence a generated schedule; anything else in the
+# payload (descriptions, links, ...) is ignored when building the cache key.
+CLASS_KEY_FIELDS = (
+    "id", "class_name", "class_number", "semesters_offered", "credits",
+    "is_senior_class", "restrictions", "prerequisites", "corequisites",
+    "days_offered", "times_offered", "from_course", "course_type",
+)
+
+# Preferences read by ScheduleDataProcessor into the scheduling parameters
+PARAM_KEY_FIELDS = (
+    "approach", "startSemester", "limitFirstYear", "eilLevel",
+    "fallWinterCredits", "springCredits", "majorClassLimit", "firstYearLimits",
+    "timeBudget",
+)
+
+# Fields of a /reschedule payload that, with the above, decide its result
+RESCHEDULE_KEY_FIELDS = ("schedule", "lockedSemesters", "dropped")
+
+# Payload fields that narrow a catalog to one student's needs (see
+# ScheduleDataProcessor.prune_classes)
+PRUNE_KEY_FIELDS = ("required", "completed", "selectElectives")
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _dep_ids(values: Any) -> list:
+    out = []
+    for v in values or []:
+        out.append(v.get("id") if isinstance(v, dict) else v)
+    return out
+
+
+def _canonical_class(cls: Dict) -> Dict:
+    out = {k: cls[k] for k in CLASS_KEY_FIELDS if k in cls}
+    if "prerequisites" in out:
+        out["prerequisites"] = _dep_ids(out["prerequisites"])
+    if "corequisites" in out:
+        out["corequisites"] = _dep_ids(out["corequisites"])
+    return out
+
+
+def _digest(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def classes_key(payload: Dict) -> str:
+    """Content hash of the class data in a raw payload.
+
+    Class order is kept: it decides catalog order and therefore tie-breaks.
+    """
+    if isinstance(payload.get("classes"), list):
+        return _digest(["classes", [_canonical_class(c) for c in payload["classes"] if isinstance(c, dict)]])
+    return _digest(["courseData", payload.get("courseData")])
+
+
+def params_key(preferences: Dict) -> str:
+    preferences = preferences or {}
+    return _digest({k: preferences.get(k) for k in PARAM_KEY_FIELDS})
+
+
+def pruned_key(catalog: str, payload: Dict) -> str:
+    """``catalog`` narrowed by the payload's required/completed classes and elective selection, if any."""
+    if payload.get("required") is None and not payload.get("completed") and not payload.get("selectElectives"):
+        return catalog
+    return catalog + ":" + _digest({k: payload.get(k) for k in PRUNE_KEY_FIELDS})
+
+
+def catalog_key(payload: Dict) -> str:
+    """The catalog a payload schedules against: its catalogId, or its classes_key
+    (either narrowed by pruned_key)."""
+    has_classes = isinstance(payload.get("classes"), list) or isinstance(payload.get("courseData"), list)
+    catalog = payload.get("catalogId") if not has_classes else None
+    return pruned_key(str(catalog) if catalog else classes_key(payload), payload)
+
+
+def schedule_key(payload: Dict, catalog: Optional[str] = None) -> str:
+    """Cache key for a /generate-schedule payload: classes plus scheduling parameters.
+
+    A registered catalog's id is its classes_key, so requests that send a
+    catalogId share entries with ones that send the same classes inline.
+    Pass ``catalog`` when its catalog_key is already known.
+    """
+    return (catalog or catalog_key(payload)) + ":" + params_key(payload.get("preferences"))
+
+
+def reschedule_key(payload: Dict, catalog: Optional[str] = None) -> str:
+    """Cache key for a /reschedule payload: its schedule_key plus the earlier plan and the change."""
+    return schedule_key(payload, catalog) + ":" + _digest({k: payload.get(k) for k in RESCHEDULE_KEY_FIELDS})
+
+
+def variant_key(schedule: str, variant: int) -> str:
+    """Cache key for an alternative schedule; variant 0 shares the ordinary schedule's entry."""
+    return f"{schedule}:variant:{variant}" if variant else schedule
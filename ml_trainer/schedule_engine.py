@@ -0,0 +1,502 @@
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from course_graph import CourseGraph, EIL, MAJOR, RELIGION, TERM_BITS
+from meeting_times import book
+from metrics import CATALOG_CLASSES, SEMESTERS_PRODUCED, STAGE_SECONDS, observe
+from ready_set import ReadySet
+from vector_ops import descending_ranks, row_lengths
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------- Data models -----------------------------
+
+@dataclass
+class Semester:
+    type: str  # Fall, Winter, Spring
+    year: int
+    credit_limit: int
+
+
+class SemesterLoad:
+    """Running totals for the semester being filled; every admission check reads these."""
+
+    __slots__ = ("semester", "courses", "credits", "religion", "majors", "busy")
+
+    def __init__(self, semester: Semester):
+        self.semester = semester
+        self.courses: List[int] = []  # catalog indices, in placement order
+        self.credits = 0
+        self.religion = 0
+        self.majors = 0
+        # Weekly minutes taken by the courses' meetings (see meeting_times)
+        self.busy = 0
+
+    @property
+    def cap(self) -> int:
+        return self.semester.credit_limit
+
+
+
+class ScheduleTimeout(Exception):
+    """A schedule run went past its deadline."""
+
+# ----------------------------- Helpers -----------------------------
+
+
+def next_semester_type(sem_type: str) -> str:
+    if sem_type == "Fall":
+        return "Winter"
+    if sem_type == "Winter":
+        return "Spring"
+    return "Fall"
+
+
+def next_term(sem_type: str, year: int) -> Tuple[str, int]:
+    # Winter is in the next calendar year; Spring and Fall stay in the same one
+    return next_semester_type(sem_type), year + 1 if sem_type == "Fall" else year
+
+
+# Position within a calendar year, for putting terms in chronological order
+TERM_ORDER = {"Winter": 0, "Spring": 1, "Fall": 2}
+
+
+def term_ordinal(sem_type: str, year: int) -> int:
+    """Chronological position of a term; consecutive terms differ by one."""
+    return year * 3 + TERM_ORDER[sem_type]
+
+
+def term_depths(graph: CourseGraph) -> List[int]:
+    """Each course's critical path in terms; computed once per catalog.
+
+    The fewest consecutive terms it takes to complete the course and then its
+    longest chain of dependents, each taken in a later term that offers it,
+    starting from the course's best offered term. 0 for a course that can
+    never be taken: one offered in no term, or behind such a course or a
+    prerequisite cycle.
+    """
+    depth = graph.derived.get("term_depth")
+    if depth is not None:
+        return depth
+    n = len(graph)
+    # Term bits in calendar order, so phase p + 1 is the term after phase p
+    bits = [TERM_BITS[t] for t in sorted(TERM_ORDER, key=TERM_ORDER.get)]
+    terms = graph.terms
+
+    # Kahn order over prerequisites; courses on or behind a cycle never appear
+    unmet = row_lengths(graph.prereq_offsets)
+    order = [i for i in range(n) if not unmet[i]]
+    takeable = bytearray(n)
+    for i in order:  # grows while it is walked
+        if terms[i] and all(takeable[p] for p in graph.prereqs(i)):
+            takeable[i] = 1
+        for d in graph.dependents(i):
+            unmet[d] -= 1
+            if not unmet[d]:
+                order.append(d)
+
+    # after[p][d]: terms from a prerequisite taken in phase p through the end
+    # of d's chain, taking d in the next term that offers it (0: never)
+    after = [[0] * n for _ in range(3)]
+    depth = [0] * n
+    offsets, targets = graph.dependent_offsets, graph.dependent_targets
+    for i in reversed(order):
+        if not takeable[i]:
+            continue
+        dependents = targets[offsets[i]:offsets[i + 1]]
+        chain = [
+            max([1] + [after[p][d] for d in dependents]) if terms[i] & bits[p] else 0
+            for p in range(3)
+        ]
+        depth[i] = min(c for c in chain if c)
+        for p in range(3):
+            for gap in (1, 2, 3):
+                if chain[(p + gap) % 3]:
+                    after[p][i] = gap + chain[(p + gap) % 3]
+                    break
+    graph.derived["term_depth"] = depth
+    return depth
+
+
+def priority_columns(graph: CourseGraph) -> List[List[int]]:
+    # Per-course sort keys, most significant first; higher sorts earlier
+    # 1) religion/EIL first, 2) critical path in offered terms (term_depths),
+    # 3) fewer offerings, 4) stable id
+    # A dependent count used to sit between 2) and 3), but it was computed
+    # against the list being sorted, which CPython empties while it computes
+    # keys, so it was always zero. CourseGraph.dependents has the real counts.
+    priority_flags = RELIGION | EIL
+    return [
+        [1 if flags & priority_flags else 0 for flags in graph.flags],
+        term_depths(graph),
+        # Negative flexibility to sort fewer offerings first
+        [-len(offered) for offered in graph.offered],
+        [-cid for cid in graph.ids],
+    ]
+
+
+def priority_rank(graph: CourseGraph) -> List[int]:
+    """Each course's position in priority order; computed once per catalog."""
+    rank = graph.derived.get("priority_rank")
+    if rank is None:
+        rank = graph.derived["priority_rank"] = descending_ranks(priority_columns(graph))
+    return rank
+
+
+# Largest weight a variant gives chain depth or offering scarcity
+VARIANT_MAX_WEIGHT = 4
+
+
+def variant_rank(graph: CourseGraph, variant: int) -> List[int]:
+    """A perturbed priority order for alternative schedules (variant > 0).
+
+    Religion/EIL still come first; chain depth and fewer offerings are
+    blended with weights drawn from the variant number, and ties fall in a
+    shuffled order instead of by id. Cached per catalog and variant.
+    """
+    key = ("variant_rank", variant)
+    rank = graph.derived.get(key)
+    if rank is None:
+        rng = random.Random(variant)
+        priority, depth, flexibility, _ = priority_columns(graph)
+        depth_weight = rng.randint(0, VARIANT_MAX_WEIGHT)
+        flexibility_weight = rng.randint(0, VARIANT_MAX_WEIGHT)
+        ties = list(range(len(graph)))
+        rng.shuffle(ties)
+        rank = graph.derived[key] = descending_ranks([
+            priority,
+            [depth_weight * d + flexibility_weight * f for d, f in zip(depth, flexibility)],
+            ties,
+        ])
+    return rank
+
+# ----------------------------- Rules -----------------------------
+
+# An admission check gets the semester's running totals and a candidate
+# course index (the head of a corequisite bundle) and says whether the
+# whole bundle may be added.
+AdmissionCheck = Callable[[SemesterLoad, int], bool]
+
+
+class Rule:
+    """A scheduling rule. Subclasses override only the hooks they need."""
+
+    def claims(self, graph: CourseGraph) -> Iterable[int]:
+        """Course indices this rule places itself, kept out of the greedy pass."""
+        return ()
+
+    def compile(self, graph: CourseGraph) -> Optional[AdmissionCheck]:
+        """Return an admission check bound to this request's graph, if any."""
+        return None
+
+    def seed(self, plan: "Planner") -> None:
+        """Place courses before the main loop runs."""
+
+    def finalize(self, schedule: List[Dict]) -> List[Dict]:
+        """Post-process the emitted semesters."""
+        return schedule
+
+
+class CreditCaps(Rule):
+    """Per-term credit caps, with optional lower caps for the first three terms."""
+
+    def __init__(self, fall_winter: int, spring: int,
+                 first_year_fw: Optional[int] = None,
+                 first_year_sp: Optional[int] = None,
+                 limit_first_year: bool = False):
+        self.fall_winter = fall_winter
+        self.spring = spring
+        self.first_year_fw = fall_winter if first_year_fw is None else first_year_fw
+        self.first_year_sp = spring if first_year_sp is None else first_year_sp
+        self.limit_first_year = limit_first_year
+
+    def cap_for(self, index: int, sem_type: str) -> int:
+        if index < 3 and self.limit_first_year:
+            return self.first_year_sp if sem_type == "Spring" else self.first_year_fw
+        return self.spring if sem_type == "Spring" else self.fall_winter
+
+    def largest(self) -> int:
+        """The highest cap any term gets."""
+        caps = [self.fall_winter, self.spring]
+        if self.limit_first_year:
+            caps += [self.first_year_fw, self.first_year_sp]
+        return max(caps)
+
+    def compile(self, graph: CourseGraph) -> AdmissionCheck:
+        bundle_credits = graph.bundle_credits
+
+        def check(load: SemesterLoad, i: int) -> bool:
+            return load.credits + bundle_credits[i] <= load.semester.credit_limit
+        return check
+
+
+class Horizon(Rule, ABC):
+    """Decides which semesters exist and drives the main loop over them."""
+
+    @abstractmethod
+    def initial(self, start_semester: str, caps: CreditCaps) -> List[Semester]:
+        """The semesters a schedule starts with."""
+
+    @abstractmethod
+    def steps(self, plan: "Planner") -> Iterator[None]:
+        """Drive the main loop, yielding after each semester it emits."""
+
+    @staticmethod
+    def build(start_semester: str, caps: CreditCaps, count: int) -> List[Semester]:
+        sem_type, year_s = start_semester.split()
+        year = int(year_s)
+        semesters: List[Semester] = []
+        for i in range(count):
+            semesters.append(Semester(sem_type, year, caps.cap_for(i, sem_type)))
+            sem_type, year = next_term(sem_type, year)
+        return semesters
+
+
+@dataclass
+class ScheduleConfig:
+    """One scheduling approach: caps, horizon and the remaining rules."""
+    approach: str
+    caps: CreditCaps
+    horizon: Horizon
+    rules: List[Rule] = field(default_factory=list)
+    # Rank candidates by priority_rank() instead of payload order
+    rank_by_priority: bool = False
+    # Non-zero: rank by variant_rank() instead (alternative schedules)
+    variant: int = 0
+    # Parameter keys echoed into the result metadata
+    metadata_params: Tuple[str, ...] = ()
+
+# ----------------------------- Engine -----------------------------
+
+
+class Planner:
+    """Per-request scheduling state shared by the rules."""
+
+    def __init__(self, processed: Dict, config: ScheduleConfig, graph: Optional[CourseGraph] = None,
+                 deadline: Optional[float] = None, progress: Optional[Callable[[int], None]] = None):
+        self.params = processed["parameters"]
+        self.config = config
+        # Wall-clock time (time.time()) after which fill() gives up
+        self.deadline = deadline
+        # Called with the number of semesters emitted so far
+        self.progress = progress
+        self.graph = graph if graph is not None else CourseGraph.from_processed(processed)
+        self.start_semester = self.params.get("startSemester") or "Fall 2025"
+
+        rules = [config.caps, config.horizon] + list(config.rules)
+        self.rules = rules
+        # Compile the admission pipeline once per request
+        self.checks: Tuple[AdmissionCheck, ...] = tuple(
+            check for check in (r.compile(self.graph) for r in rules) if check is not None
+        )
+
+        n = len(self.graph)
+        if config.variant:
+            rank = variant_rank(self.graph, config.variant)
+        elif config.rank_by_priority:
+            rank = priority_rank(self.graph)
+        else:
+            rank = range(n)
+        claimed = set()
+        for r in rules:
+            claimed.update(r.claims(self.graph))
+        self.ready = ReadySet(self.graph,
+                              rank,
+                              (i for i in range(n) if i not in claimed))
+
+        self.semesters = config.horizon.initial(self.start_semester, config.caps)
+        self.scheduled: List[Dict] = []
+        # Leading entries of self.scheduled that were locked in an earlier
+        # plan; finalize rules only see the semesters after them
+        self.frozen = 0
+        # Courses taken in those semesters or dropped (set by FrozenPrefix);
+        # a bundle placed later leaves these members out
+        self.locked: Optional[bytearray] = None
+
+    def add(self, load: SemesterLoad, i: int) -> None:
+        """Place a single course into the semester, bypassing admission checks."""
+        flags = self.graph.flags[i]
+        self.ready.place(i)
+        load.courses.append(i)
+        load.credits += self.graph.credits[i]
+        if flags & RELIGION:
+            load.religion += 1
+        if flags & MAJOR:
+            load.majors += 1
+        if self.graph.has_meetings:
+            self.book(load, (i,))
+
+    def book(self, load: SemesterLoad, courses: Iterable[int]) -> None:
+        """Take the courses' meeting times in the semester (see meeting_times.book).
+
+        Courses placed without admission checks (see add) can clash anyway;
+        those take their first offered time regardless.
+        """
+        meetings = [self.graph.meetings[i] for i in courses]
+        busy = book(load.busy, meetings)
+        if busy is None:
+            busy = load.busy
+            for options in meetings:
+                if options:
+                    busy |= options[0]
+        load.busy = busy
+
+    def fill(self, load: SemesterLoad) -> SemesterLoad:
+        """Greedily add ready bundles to the semester until nothing else is admitted."""
+        if self.deadline is not None and time.time() > self.deadline:
+            raise ScheduleTimeout("Schedule generation exceeded its deadline")
+        graph = self.graph
+        ready = self.ready
+        checks = self.checks
+        cap = load.semester.credit_limit
+        offsets = graph.bundle_offsets
+        members = graph.bundle_members
+        locked = self.locked
+        has_meetings = graph.has_meetings
+
+        def visit(i: int) -> bool:
+            for check in checks:
+                if not check(load, i):
+                    return True
+            if locked is not None:
+                for k in range(offsets[i], offsets[i + 1]):
+                    if not locked[members[k]]:
+                        self.add(load, members[k])
+                return load.credits < cap
+            for k in range(offsets[i], offsets[i + 1]):
+                j = members[k]
+                ready.place(j)
+                load.courses.append(j)
+            if has_meetings:
+                self.book(load, members[offsets[i]:offsets[i + 1]])
+            load.credits += graph.bundle_credits[i]
+            load.religion += graph.bundle_religion[i]
+            load.majors += graph.bundle_majors[i]
+            # If we hit the cap, stop adding
+            return load.credits < cap
+
+        ready.sweep(load.semester.type, visit)
+        return load
+
+    def stalled(self) -> bool:
+        """True once no remaining course can be placed in any later term.
+
+        Only courses on the ready frontier can be placed, and the frontier
+        only grows when something is placed, so once nothing on it is offered
+        in any term the rest (never offered, or behind such a course, an
+        unplaced claimed course or a prerequisite cycle) can't be placed.
+        """
+        return not any(self.ready.eligible(term) for term in TERM_BITS)
+
+    def emit(self, load: SemesterLoad) -> None:
+        sem = load.semester
+        self.scheduled.append({
+            "type": sem.type,
+            "year": sem.year,
+            "classes": [self.graph.course_dict(i) for i in load.courses],
+            "totalCredits": load.credits
+        })
+        if self.progress is not None:
+            self.progress(len(self.scheduled))
+
+    def extend(self) -> Semester:
+        last = self.semesters[-1]
+        sem_type, year = next_term(last.type, last.year)
+        sem = Semester(sem_type, year, self.config.caps.cap_for(len(self.semesters), sem_type))
+        self.semesters.append(sem)
+        return sem
+
+    def stream(self) -> Iterator[Dict]:
+        """Schedule everything, yielding stream records as semesters settle.
+
+        Each semester is yielded as a "semester" record as soon as it is
+        emitted. Finalize rules run at the end and may still change earlier
+        semesters: an "amend" record replaces (or adds) the semester at its
+        index and a "truncate" record drops everything from ``length`` on.
+        A "metadata" record comes last.
+        """
+        for rule in self.rules:
+            rule.seed(self)
+        steps = self.config.horizon.steps(self)
+        sent = 0
+        elapsed = 0.0  # time in the main loop itself, not in the consumer
+        while True:
+            for index in range(sent, len(self.scheduled)):
+                yield {"type": "semester", "index": index, "semester": self.scheduled[index]}
+            sent = len(self.scheduled)
+            start = time.perf_counter()
+            try:
+                next(steps)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+        observe(STAGE_SECONDS, elapsed, "main_loop")
+
+        streamed = list(self.scheduled)
+        shapes = [(len(sem["classes"]), sem.get("totalCredits")) for sem in streamed]
+        schedule = self.scheduled[self.frozen:]
+        for rule in self.rules:
+            schedule = rule.finalize(schedule)
+        schedule = self.scheduled[:self.frozen] + schedule
+        for index, sem in enumerate(schedule):
+            if (index >= len(streamed) or sem is not streamed[index]
+                    or shapes[index] != (len(sem["classes"]), sem.get("totalCredits"))):
+                yield {"type": "amend", "index": index, "semester": sem}
+        if len(schedule) < len(streamed):
+            yield {"type": "truncate", "length": len(schedule)}
+        observe(CATALOG_CLASSES, len(self.graph))
+        observe(SEMESTERS_PRODUCED, len(schedule))
+
+        metadata = {
+            "approach": self.config.approach,
+            "startSemester": self.start_semester,
+        }
+        if self.frozen:
+            metadata["lockedSemesters"] = self.frozen
+        for key in self.config.metadata_params:
+            metadata[key] = (self.params or {}).get(key)
+        metadata["generatedAt"] = datetime.now().isoformat()
+        yield {"type": "metadata", "metadata": metadata}
+
+    def run(self) -> Dict:
+        return collect_records(self.stream())
+
+
+def result_records(result: Dict) -> Iterator[Dict]:
+    """Stream records for an already finished result."""
+    for index, sem in enumerate(result.get("schedule", [])):
+        yield {"type": "semester", "index": index, "semester": sem}
+    yield {"type": "metadata", "metadata": result.get("metadata", {})}
+
+
+def apply_record(result: Dict, record: Dict) -> None:
+    """Fold one stream record into a {"metadata", "schedule"} result."""
+    kind = record["type"]
+    schedule = result["schedule"]
+    if kind in ("semester", "amend"):
+        if record["index"] < len(schedule):
+            schedule[record["index"]] = record["semester"]
+        else:
+            schedule.append(record["semester"])
+    elif kind == "truncate":
+        del schedule[record["length"]:]
+    elif kind == "metadata":
+        result["metadata"] = record["metadata"]
+
+
+def collect_records(records: Iterable[Dict]) -> Dict:
+    result: Dict = {"metadata": {}, "schedule": []}
+    for record in records:
+        apply_record(result, record)
+    return result
+
+
+def run_schedule(processed: Dict, config: ScheduleConfig, graph: Optional[CourseGraph] = None,
+                 deadline: Optional[float] = None, progress: Optional[Callable[[int], None]] = None) -> Dict:
+    return Planner(processed, config, graph, deadline, progress).run()
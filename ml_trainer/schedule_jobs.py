@@ -0,0 +1,183 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """The job queue already holds its maximum number of unfinished jobs."""
+
+
+class Progress:
+    """Semesters placed so far by a running job."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: int = 0):
+        self.value = value
+
+
+class Job:
+    """One submitted schedule request and, once finished, its outcome."""
+
+    def __init__(self, key: str, progress: Any):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        # Anything with a ``value`` attribute; the scheduling backend writes to it
+        self.progress = progress
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.http_status = 200
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.expires_at: Optional[float] = None  # time.monotonic(); set when finished
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def semesters_placed(self) -> int:
+        if self.result is not None:
+            return len(self.result.get("schedule", []))
+        try:
+            return int(self.progress.value)
+        except Exception:  # backend progress channel already gone
+            return 0
+
+    def describe(self) -> Dict:
+        info = {
+            "jobId": self.job_id,
+            "status": self.status,
+            "progress": {"semestersPlaced": self.semesters_placed()},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+class JobQueue:
+    """Bounded background queue for schedule jobs.
+
+    Identical submissions (same key) share one job while it is queued,
+    running or finished and unexpired. Finished jobs are dropped
+    ``ttl_seconds`` after they finish.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 64, ttl_seconds: float = 600.0):
+        self.max_pending = max(1, int(max_pending))
+        self.ttl_seconds = float(ttl_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.expires_at is not None and job.expires_at <= now:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) == job_id:
+                    del self._by_key[job.key]
+                self.expired += 1
+
+    def _pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def submit(self, key: str, work: Callable[[Job], Tuple[Dict, int]],
+               new_progress: Callable[[], Any] = Progress) -> Tuple[Job, bool]:
+        """Queue ``work(job)`` unless an identical job exists.
+
+        ``work`` returns (result, http_status); ``new_progress`` builds the
+        job's progress object. Returns (job, deduplicated); raises QueueFull
+        when too many jobs are unfinished.
+        """
+        with self._lock:
+            self._expire()
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            # A failed job isn't reused, so resubmitting retries it
+            if existing is not None and existing.status != FAILED:
+                self.deduplicated += 1
+                return existing, True
+            if self._pending() >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"Job queue is full ({self.max_pending} unfinished jobs)")
+            job = Job(key, new_progress())
+            self._jobs[job.job_id] = job
+            self._by_key[key] = job.job_id
+            self.submitted += 1
+        self._executor.submit(self._run, job, work)
+        return job, False
+
+    def complete(self, key: str, result: Dict) -> Tuple[Job, bool]:
+        """Record an already-known result (e.g. a cache hit) as a finished job."""
+        with self._lock:
+            self._expire()
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and existing.status == SUCCEEDED:
+                self.deduplicated += 1
+                return existing, True
+            job = Job(key, Progress())
+            job.started_at = job.created_at
+            self._jobs[job.job_id] = job
+            self._by_key[key] = job.job_id
+            self.submitted += 1
+            self._finish(job, result, 200)
+        return job, False
+
+    def _finish(self, job: Job, result: Optional[Dict], http_status: int, error: Optional[str] = None) -> None:
+        ok = http_status == 200
+        job.result = result if ok else None
+        if not ok:
+            job.error = error or (result or {}).get("error") or "Schedule generation failed"
+        job.http_status = http_status
+        job.status = SUCCEEDED if ok else FAILED
+        job.finished_at = datetime.now().isoformat()
+        job.expires_at = time.monotonic() + self.ttl_seconds
+
+    def _run(self, job: Job, work: Callable[[Job], Tuple[Dict, int]]) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.now().isoformat()
+        try:
+            result, http_status = work(job)
+            with self._lock:
+                self._finish(job, result, http_status)
+        except Exception as e:
+            with self._lock:
+                self._finish(job, None, 500, str(e))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._expire()
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {
+                **counts,
+                "max_pending": self.max_pending,
+                "ttl_seconds": self.ttl_seconds,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "expired": self.expired,
+            }
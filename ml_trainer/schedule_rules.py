@@ -0,0 +1,274 @@
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from course_graph import CourseGraph, EIL
+from meeting_times import book
+from metrics import timed
+from schedule_engine import (
+    AdmissionCheck,
+    CreditCaps,
+    Horizon,
+    Planner,
+    Rule,
+    Semester,
+    SemesterLoad,
+    TERM_ORDER,
+    next_term,
+    term_ordinal,
+)
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------- Admission rules -----------------------------
+
+
+class OneReligionPerTerm(Rule):
+    """At most one religion course per semester."""
+
+    def compile(self, graph: CourseGraph) -> AdmissionCheck:
+        bundle_religion = graph.bundle_religion
+
+        def check(load: SemesterLoad, i: int) -> bool:
+            return not (bundle_religion[i] and load.religion)
+        return check
+
+
+class MajorClassLimit(Rule):
+    """At most ``limit`` major classes per semester."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+
+    def compile(self, graph: CourseGraph) -> AdmissionCheck:
+        bundle_majors = graph.bundle_majors
+        limit = self.limit
+
+        def check(load: SemesterLoad, i: int) -> bool:
+            return load.majors + bundle_majors[i] <= limit
+        return check
+
+
+class MeetingTimes(Rule):
+    """No two courses in a semester meet at the same time.
+
+    Courses with more than one offered time take the first that is free;
+    courses without days and times never conflict. Adds no check for a
+    catalog without any set times.
+    """
+
+    def compile(self, graph: CourseGraph) -> Optional[AdmissionCheck]:
+        if not graph.has_meetings:
+            return None
+        meetings = graph.meetings
+        offsets, members = graph.bundle_offsets, graph.bundle_members
+
+        def check(load: SemesterLoad, i: int) -> bool:
+            bundle = members[offsets[i]:offsets[i + 1]]
+            return book(load.busy, (meetings[j] for j in bundle)) is not None
+        return check
+
+# ----------------------------- Placement rules -----------------------------
+
+
+class EilPlacement(Rule):
+    """Place EIL courses up front: STDEV 100R/EIL 313/EIL 317 (then EIL 201)
+    in the first semester, EIL 320 plus any leftover EIL 201 in the second.
+    Each seeded semester is then topped up by the greedy pass."""
+
+    def claims(self, graph: CourseGraph) -> Iterable[int]:
+        self.first_required: List[int] = []
+        self.first_flexible: List[int] = []
+        self.second_required: List[int] = []
+        for i in range(len(graph)):
+            if not graph.flags[i] & EIL:
+                continue
+            class_number = graph.class_numbers[i]
+            if class_number == "EIL 320":
+                self.second_required.append(i)
+            elif class_number == "EIL 201":
+                self.first_flexible.append(i)
+            else:  # STDEV 100R, EIL 313, EIL 317
+                self.first_required.append(i)
+        return self.first_required + self.first_flexible + self.second_required
+
+    def _place(self, plan: Planner, sem: Semester, candidates: List[int]) -> None:
+        graph = plan.graph
+        load = SemesterLoad(sem)
+        for i in candidates:
+            if graph.offered_in(i, sem.type) and load.credits + graph.credits[i] <= sem.credit_limit:
+                plan.add(load, i)
+        if load.courses:
+            # Fill up the rest of the semester using greedy selection for non-EIL courses
+            plan.emit(plan.fill(load))
+
+    @timed("eil_placement")
+    def seed(self, plan: Planner) -> None:
+        # After a locked prefix (FrozenPrefix), EIL goes into the first open
+        # terms and courses taken in the locked terms are left out
+        first = len(plan.scheduled)
+        first_required = [i for i in self.first_required if not plan.ready.is_placed(i)]
+        first_flexible = [i for i in self.first_flexible if not plan.ready.is_placed(i)]
+        second_required = [i for i in self.second_required if not plan.ready.is_placed(i)]
+        # EIL 320 moves up when the first-term courses were all taken already
+        second = first if first and not (first_required or first_flexible) else first + 1
+        # 1) First semester: place required EIL, then flexible
+        if len(plan.semesters) > first:
+            self._place(plan, plan.semesters[first], first_required + first_flexible)
+        # 2) Second semester: EIL 320 + any leftover EIL 201 if not placed
+        if len(plan.semesters) > second and (second_required or first_flexible):
+            leftover = [i for i in first_flexible if not plan.ready.is_placed(i)]
+            self._place(plan, plan.semesters[second], second_required + leftover)
+
+
+class FrozenPrefix(Rule):
+    """Keep the locked leading semesters of an earlier plan and schedule after them.
+
+    The locked semesters are emitted as given and their courses count as
+    taken. ``dropped`` course ids are treated like classes missing from the
+    catalog: never placed, and not holding back their dependents. Must come
+    before any rule that seeds semesters.
+    """
+
+    def __init__(self, semesters: List[Dict], dropped: Iterable[int] = ()):
+        self.semesters = semesters
+        self.dropped = list(dropped)
+
+    def claims(self, graph: CourseGraph) -> Iterable[int]:
+        ids = [c.get("id") for sem in self.semesters for c in sem["classes"]] + self.dropped
+        self.taken = [i for i in map(graph.index_of, ids) if i is not None]
+        return self.taken
+
+    def seed(self, plan: Planner) -> None:
+        plan.locked = bytearray(len(plan.graph))
+        for i in self.taken:
+            plan.ready.place(i)
+            plan.locked[i] = 1
+        if not self.semesters:
+            return
+        plan.scheduled.extend(self.semesters)
+        plan.frozen = len(plan.scheduled)
+
+        # Line plan.semesters up with plan.scheduled: the locked terms as
+        # emitted (an empty term never was), then the terms after the last one
+        caps = plan.config.caps
+        origin = term_ordinal(plan.semesters[0].type, plan.semesters[0].year)
+        semesters = []
+        for sem in self.semesters:
+            index = max(0, term_ordinal(sem["type"], sem["year"]) - origin)
+            semesters.append(Semester(sem["type"], sem["year"], caps.cap_for(index, sem["type"])))
+        sem_type, year = next_term(semesters[-1].type, semesters[-1].year)
+        while len(semesters) < len(plan.semesters):
+            index += 1
+            semesters.append(Semester(sem_type, year, caps.cap_for(index, sem_type)))
+            sem_type, year = next_term(sem_type, year)
+        plan.semesters = semesters
+
+
+class FinalReligionMove(Rule):
+    """Move a lone religion course out of the last semester if an earlier one has room."""
+
+    def __init__(self, caps: CreditCaps):
+        self.caps = caps
+
+    @timed("final_religion")
+    def finalize(self, schedule: List[Dict]) -> List[Dict]:
+        return optimize_final_religion(schedule, self.caps.fall_winter, self.caps.spring)
+
+
+def optimize_final_religion(scheduled: List[Dict], fw_cap: int, sp_cap: int) -> List[Dict]:
+    if not scheduled:
+        return scheduled
+    last = scheduled[-1]
+    if len(last.get("classes", [])) != 1:
+        return scheduled
+    only = last["classes"][0]
+    if not str(only.get("class_number", "")).startswith("REL "):
+        return scheduled
+
+    # Try to place earlier
+    for i in range(len(scheduled) - 1):
+        sem = scheduled[i]
+        cap = sp_cap if sem["type"] == "Spring" else fw_cap
+        has_religion = any(str(cc.get("class_number", "")).startswith("REL ") for cc in sem.get("classes", []))
+        if has_religion:
+            continue
+        if sem["totalCredits"] + only.get("credits", 0) <= cap:
+            sem["classes"].append(only)
+            sem["totalCredits"] += only.get("credits", 0)
+            scheduled.pop()
+            break
+    return scheduled
+
+# ----------------------------- Horizons -----------------------------
+
+
+class ExtendingHorizon(Horizon):
+    """Keep adding semesters until every course is placed, up to ``max_total``.
+    Empty semesters are skipped; ``max_idle`` empty terms in a row end the run."""
+
+    def __init__(self, initial: int = 15, max_total: int = 24, max_idle: int = 9):
+        self.initial_count = initial
+        self.max_total = max_total
+        self.max_idle = max_idle
+
+    def initial(self, start_semester: str, caps: CreditCaps) -> List[Semester]:
+        return self.build(start_semester, caps, self.initial_count)
+
+    def steps(self, plan: Planner) -> Iterator[None]:
+        sem_idx = len(plan.scheduled)
+        no_progress = 0
+        # Term types that came up empty since the last placement, counting
+        # only terms past the first-year caps
+        idle_types = set()
+        while plan.ready.remaining:
+            if sem_idx >= len(plan.semesters):
+                # Extend semesters if needed, but cap total count
+                if len(plan.semesters) >= self.max_total:
+                    logger.info("Reached max semesters without scheduling more courses; stopping.")
+                    break
+                plan.extend()
+            load = plan.fill(SemesterLoad(plan.semesters[sem_idx]))
+            if load.courses:
+                plan.emit(load)
+                no_progress = 0
+                idle_types.clear()
+                yield
+            else:
+                # No course could be scheduled in this semester; advance
+                no_progress += 1
+                if plan.stalled():
+                    logger.info("No remaining course can be placed in any term; stopping.")
+                    break
+                # Nothing changes between empty terms, so once every term
+                # type has come up empty at its regular cap, all later terms would too
+                if sem_idx >= 3:
+                    idle_types.add(plan.semesters[sem_idx].type)
+                    if len(idle_types) == len(TERM_ORDER):
+                        logger.info("No course fits in any term type; stopping.")
+                        break
+                # If we've cycled through many terms with no progress, stop
+                if no_progress >= self.max_idle:
+                    logger.info("No schedulable courses for multiple consecutive terms; stopping.")
+                    break
+            sem_idx += 1
+
+
+class FixedHorizon(Horizon):
+    """Emit exactly ``count`` semesters, empty ones included."""
+
+    def __init__(self, count: int = 10):
+        self.count = count
+
+    def initial(self, start_semester: str, caps: CreditCaps) -> List[Semester]:
+        return self.build(start_semester, caps, self.count)
+
+    def steps(self, plan: Planner) -> Iterator[None]:
+        stalled = False
+        for sem in plan.semesters[len(plan.scheduled):]:
+            load = SemesterLoad(sem)
+            # Once nothing more can be placed the rest are emitted empty
+            if not stalled:
+                plan.fill(load)
+                stalled = not load.courses and (not plan.ready.remaining or plan.stalled())
+            plan.emit(load)
+            yield
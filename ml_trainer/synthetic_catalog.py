@@ -0,0 +1,111 @@
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+TERMS = ["Fall", "Winter", "Spring"]
+EIL_NUMBERS = ["STDEV 100R", "EIL 313", "EIL 317", "EIL 201", "EIL 320"]
+
+
+@dataclass
+class CatalogSpec:
+    """Shape of a generated catalog.
+
+    Classes are spread over ``depth`` prerequisite levels; each class above
+    level 0 takes up to ``fan_out`` prerequisites from lower levels (at least
+    one from the level just below, so chains really are ``depth`` long).
+    """
+    classes: int = 200
+    depth: int = 6
+    fan_out: int = 2
+    # Share of classes paired with a same-level corequisite
+    coreq_density: float = 0.05
+    # Chance that a class is offered in any given term (at least one is kept)
+    offer_probability: float = 0.6
+    religion_share: float = 0.1
+    eil_share: float = 0.03
+    major_share: float = 0.5
+    seed: int = 0
+
+    def describe(self) -> Dict:
+        return asdict(self)
+
+
+def _category(rng: random.Random, spec: CatalogSpec, eil_index: int):
+    r = rng.random()
+    if r < spec.religion_share:
+        return f"REL {rng.randint(100, 399)}", "religion"
+    r -= spec.religion_share
+    if r < spec.eil_share:
+        return EIL_NUMBERS[eil_index % len(EIL_NUMBERS)], "eil"
+    r -= spec.eil_share
+    if r < spec.major_share:
+        return f"CS {rng.randint(100, 499)}", "major"
+    return f"MATH {rng.randint(100, 499)}", "minor"
+
+
+def generate_classes(spec: CatalogSpec) -> List[Dict]:
+    """Classes in the /generate-schedule ``classes`` payload shape."""
+    rng = random.Random(spec.seed)
+    depth = max(1, spec.depth)
+    levels: List[List[int]] = [[] for _ in range(depth)]
+    classes: List[Dict] = []
+    eil_count = 0
+    for k in range(spec.classes):
+        cid = k + 1
+        level = min(depth - 1, k * depth // max(1, spec.classes))
+        class_number, from_course = _category(rng, spec, eil_count)
+        if from_course == "eil":
+            eil_count += 1
+            level = 0
+        prereqs: List[int] = []
+        if level and levels[level - 1]:
+            prereqs.append(rng.choice(levels[level - 1]))
+            lower = [c for lvl in levels[:level] for c in lvl[-50:]]
+            for _ in range(rng.randint(0, max(0, spec.fan_out - 1))):
+                pick = rng.choice(lower)
+                if pick not in prereqs:
+                    prereqs.append(pick)
+        offered = [t for t in TERMS if rng.random() < spec.offer_probability] or [rng.choice(TERMS)]
+        levels[level].append(cid)
+        classes.append({
+            "id": cid,
+            "class_number": class_number,
+            "class_name": f"Synthetic {cid}",
+            "semesters_offered": offered,
+            "credits": rng.choice([1, 2, 3, 3, 3, 4]),
+            "is_senior_class": False,
+            "restrictions": None,
+            "prerequisites": prereqs,
+            "corequisites": [],
+            "days_offered": [],
+            "times_offered": [],
+            "from_course": from_course,
+        })
+
+    # Pair classes on the same level as mutual corequisites
+    by_id = {c["id"]: c for c in classes}
+    for level in levels:
+        for cid in level:
+            if rng.random() >= spec.coreq_density or len(level) < 2:
+                continue
+            partner = rng.choice(level)
+            if partner == cid or partner in by_id[cid]["corequisites"]:
+                continue
+            by_id[cid]["corequisites"].append(partner)
+            by_id[partner]["corequisites"].append(cid)
+    return classes
+
+
+def generate_payload(spec: CatalogSpec, preferences: Optional[Dict] = None) -> Dict:
+    return {
+        "classes": generate_classes(spec),
+        "preferences": preferences or {
+            "startSemester": "Fall 2025",
+            "approach": "credits-based",
+            "majorClassLimit": 4,
+            "fallWinterCredits": 18,
+            "springCredits": 12,
+            "limitFirstYear": False,
+            "eilLevel": "Fluent",
+        },
+    }
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from catalog_file import ARRAY_COLUMNS, DERIVED_COLUMNS, TEXT_COLUMNS, CatalogFiles, load_catalog, write_catalog
+from course_graph import CourseGraph
+from data_processor import ScheduleDataProcessor
+from schedule_backend import schedule_processed
+from synthetic_catalog import CatalogSpec, generate_payload
+
+
+def _processed(seed: int = 0) -> dict:
+    payload = generate_payload(CatalogSpec(classes=40, depth=4, coreq_density=0.2, seed=seed))
+    processed = ScheduleDataProcessor().process_payload(payload)
+    assert "error" not in processed
+    for n, cls in enumerate(list(processed["classes"].values())[:6]):
+        cls["days_offered"] = ["Monday", "Wednesday"] if n % 2 else ["Tuesday"]
+        cls["times_offered"] = ["09:00-10:15", "13:00-14:15"] if n % 3 else ["9-10am"]
+    first = next(iter(processed["classes"].values()))
+    first["class_name"] = "Théologie « 日本 »"
+    first["from_course"] = None
+    return processed
+
+
+def _store(tmp_path, **kwargs):
+    return CatalogFiles(str(tmp_path / "catalogs"), **kwargs)
+
+
+def test_mapped_catalog_matches_compiled(tmp_path):
+    processed = _processed()
+    graph = CourseGraph.from_processed(processed)
+    path = str(tmp_path / "cat.catalog")
+    write_catalog(graph, path)
+    mapped = load_catalog(path)
+
+    assert len(mapped) == len(graph)
+    for name in ARRAY_COLUMNS:
+        assert list(getattr(mapped, name)) == list(getattr(graph, name)), name
+    for name in TEXT_COLUMNS:
+        assert list(getattr(mapped, name)) == list(getattr(graph, name)), name
+    assert list(mapped.offered) == list(graph.offered)
+    assert list(mapped.meetings) == list(graph.meetings)
+    assert mapped.has_meetings and graph.has_meetings
+    assert mapped.term_sets == graph.term_sets
+    for cid in list(graph.ids) + [-1, 10 ** 9, "1", None]:
+        assert mapped.index_of(cid) == graph.index_of(cid)
+    for name, derive in DERIVED_COLUMNS.items():
+        assert list(mapped.derived[name]) == list(derive(graph)), name
+    assert [mapped.course_dict(i) for i in range(len(mapped))] == [graph.course_dict(i) for i in range(len(graph))]
+
+    expected = schedule_processed(processed, graph)
+    result = schedule_processed(processed, mapped)
+    expected["metadata"].pop("generatedAt")
+    result["metadata"].pop("generatedAt")
+    assert result == expected
+
+
+def test_first_of_duplicate_ids_is_kept(tmp_path):
+    classes = {key: {"id": key, "class_name": str(key), "class_number": "CS 100", "credits": 3,
+                     "semesters_offered": ["Fall"], "prerequisites": []} for key in (5, 7, "5")}
+    graph = CourseGraph.from_processed({"classes": classes})
+    path = str(tmp_path / "cat.catalog")
+    write_catalog(graph, path)
+    mapped = load_catalog(path)
+    assert [mapped.index_of(cid) for cid in (5, 7, 6)] == [graph.index_of(cid) for cid in (5, 7, 6)] == [0, 1, None]
+
+
+def test_bad_magic_is_ignored_and_rewritten(tmp_path):
+    files = _store(tmp_path)
+    processed = _processed()
+    # A catalog from another format version: everything but the magic is readable
+    write_catalog(CourseGraph.from_processed(processed), files.path("cat"))
+    with open(files.path("cat"), "r+b") as f:
+        f.write(b"CSCAT\x00\x00\x00")
+    with pytest.raises(ValueError):
+        load_catalog(files.path("cat"))
+    assert files.load("cat") is None
+
+    graph = files.graph("cat", processed["classes"])
+    assert hasattr(graph, "mapping")
+    assert list(graph.ids) == list(CourseGraph.from_processed(processed).ids)
+    assert files.load("cat") is not None
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    files = _store(tmp_path, max_files=2)
+    classes = _processed()["classes"]
+    for n, catalog_id in enumerate(["a", "b"]):
+        files.graph(catalog_id, classes)
+        # Older modification times than anything written later
+        os.utime(files.path(catalog_id), (1000 + n, 1000 + n))
+    # Mapping "a" again makes "b" the least recently used
+    assert files.load("a") is not None
+    files.graph("c", classes)
+
+    assert files.stats()["files"] == 2
+    assert os.path.exists(files.path("a")) and os.path.exists(files.path("c"))
+    assert not os.path.exists(files.path("b"))
+    assert files.load("b") is None
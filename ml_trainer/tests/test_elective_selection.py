@@ -0,0 +1,163 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from data_processor import ScheduleDataProcessor
+from elective_selection import _cheapest_cover, chain_depths
+
+ALL_TERMS = ["Fall", "Winter", "Spring"]
+
+
+def _class(cid, pre=(), credits=3, terms=ALL_TERMS, group=None):
+    cls = {"id": cid, "class_name": f"C{cid}", "class_number": f"X {cid}", "credits": credits,
+           "semesters_offered": list(terms), "prerequisites": list(pre), "corequisites": []}
+    if group:
+        cls["elective_group"] = {"id": group[0], "name": "Group", "required_count": group[1]}
+    return cls
+
+
+REQUIRED = [_class(1), _class(2, pre=[1])]
+# 30 -> 31 -> 20 is a chain; 21, 22 are single classes; 23 builds on required 2; 24 is never offered
+ELECTIVES = [_class(30), _class(31, pre=[30]), _class(20, pre=[31]), _class(21), _class(22),
+             _class(23, pre=[2]), _class(24, terms=[])]
+
+
+def _flat(electives, credits_needed=6):
+    """The same program as a flat "classes" payload with section fields."""
+    required = [{**cls, "course_id": 1, "section_id": 10, "is_elective_section": False} for cls in REQUIRED]
+    optional = [{**cls, "course_id": 1, "section_id": 11, "is_elective_section": True,
+                 "credits_needed": credits_needed} for cls in electives]
+    return required + optional
+
+
+def _kept_flat(classes, **extra):
+    processed = ScheduleDataProcessor().process_payload({
+        "classes": classes,
+        "preferences": {"startSemester": "Fall 2025", "approach": "credits-based"},
+        **extra,
+    })
+    return processed.get("error") or sorted(processed["classes"])
+
+
+def test_flat_payload_finds_elective_sections():
+    # Only the non-elective classes are required by default; the section is covered by a selection
+    classes = _flat(ELECTIVES)
+    assert _kept_flat(classes, completed=[1]) == [2, 21, 30]
+    assert _kept_flat(classes, required=[2], completed=[1]) == [2, 21, 30]
+
+
+def test_flat_payload_without_sections():
+    # Nothing says which classes are electives: all are required, and selection is refused
+    classes = [{k: v for k, v in cls.items() if k != "elective_group"} for cls in REQUIRED + ELECTIVES[:2]]
+    assert _kept_flat(classes, completed=[1]) == [2, 30, 31]
+    assert "selectElectives" in _kept_flat(classes, selectElectives=True)
+
+
+def _course_data(electives, credits_needed=6):
+    return [{"id": 1, "course_type": "major", "sections": [
+        {"id": 10, "is_required": True, "classes": REQUIRED},
+        {"id": 11, "is_required": False, "credits_needed_to_take": credits_needed, "classes": electives},
+    ]}]
+
+
+@pytest.fixture(params=["courseData", "classes"])
+def kept(request):
+    """Class ids kept for a program sent as legacy courseData or as flat classes."""
+    def kept(electives, credits_needed=6, **extra):
+        if request.param == "classes":
+            payload = {"classes": _flat(electives, credits_needed)}
+        else:
+            payload = {"courseData": _course_data(electives, credits_needed)}
+        processed = ScheduleDataProcessor().process_payload({
+            **payload,
+            "preferences": {"startSemester": "Fall 2025", "approach": "credits-based"},
+            **extra,
+        })
+        assert "error" not in processed
+        return sorted(processed["classes"])
+    return kept
+
+
+def test_every_elective_kept_without_selection(kept):
+    assert kept(ELECTIVES) == [1, 2, 20, 21, 22, 23, 24, 30, 31]
+
+
+def test_selection_covers_credits_without_deepening_the_plan(kept):
+    assert kept(ELECTIVES, selectElectives=True) == [1, 2, 21, 30]
+    assert kept(ELECTIVES, 9, selectElectives=True) == [1, 2, 21, 22, 30]
+
+
+def test_uncoverable_section_keeps_every_class(kept):
+    assert kept(ELECTIVES, 99, selectElectives=True) == [1, 2, 20, 21, 22, 23, 24, 30, 31]
+
+
+def test_completed_electives_count_towards_the_section(kept):
+    assert kept(ELECTIVES, selectElectives=True, completed=[21]) == [1, 2, 30]
+    assert kept(ELECTIVES, selectElectives=True, completed=[21, 22]) == [1, 2]
+
+
+def test_completed_elective_without_credits(kept):
+    electives = [_class(21), _class(22, credits=None), _class(23)]
+    assert kept(electives, selectElectives=True, completed=[22]) == [1, 2, 21, 23]
+
+
+def test_prerequisites_count_as_added_credits(kept):
+    # 43 needs a 1-credit class, 41 and 42 each a 3-credit one
+    electives = [_class(40), _class(43, pre=[45]), _class(44, pre=[46]), _class(45, credits=1),
+                 _class(46, credits=1), _class(41, pre=[40]), _class(42, pre=[40])]
+    assert kept(electives, selectElectives=True) == [1, 2, 40, 43, 45]
+
+
+def test_group_required_counts(kept):
+    electives = [_class(21), _class(22), _class(50, group=(7, 1)), _class(51, group=(7, 1))]
+    assert kept(electives, selectElectives=True) == [1, 2, 21, 50]
+    assert kept(electives, selectElectives=True, completed=[51]) == [1, 2, 21]
+
+
+def test_shallow_choice_preferred_over_fewer_credits(kept):
+    electives = [_class(63), _class(64, pre=[63]), _class(65, pre=[64]), _class(60, pre=[65]),
+                 _class(61, credits=2), _class(62, credits=2)]
+    assert kept(electives, 3, selectElectives=True) == [1, 2, 63]
+
+
+def test_chain_depths():
+    classes = {c["id"]: c for c in [_class(1), _class(2, pre=[1]), _class(3, pre=[2]), _class(4, terms=[]),
+                                    _class(5, pre=[4]), _class(6, pre=[7]), _class(7, pre=[6])]}
+    depth = chain_depths(classes, set())
+    assert [depth[i] for i in (1, 2, 3)] == [1, 2, 3]
+    assert depth[4] is None and depth[5] is None
+    assert depth[6] is None and depth[7] is None
+    assert chain_depths(classes, {1})[3] == 2
+
+
+def _brute_cover(options, credits_needed, group_counts):
+    best = None
+    for size in range(len(options) + 1):
+        for picked in combinations(options, size):
+            counts = {g: sum(1 for o in picked if o[3] == g) for g in group_counts}
+            if sum(o[1] for o in picked) < credits_needed or any(counts[g] < n for g, n in group_counts.items()):
+                continue
+            cost = (sum(o[2] for o in picked), len(picked))
+            if best is None or cost < best:
+                best = cost
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_cheapest_cover_matches_brute_force(seed):
+    rng = random.Random(seed)
+    options = [(i, rng.randint(0, 4), rng.randint(0, 6), rng.choice([None, "a", "b"]))
+               for i in range(rng.randint(1, 9))]
+    credits_needed = rng.randint(0, 12)
+    group_counts = {g: rng.randint(1, 2) for g in rng.sample(["a", "b"], rng.randint(0, 2))}
+    chosen = _cheapest_cover(options, credits_needed, group_counts)
+    expected = _brute_cover(options, credits_needed, group_counts)
+    if expected is None:
+        assert chosen is None
+        return
+    picked = [o for o in options if o[0] in chosen]
+    assert len(picked) == len(chosen)
+    assert sum(o[1] for o in picked) >= credits_needed
+    assert all(sum(1 for o in picked if o[3] == g) >= n for g, n in group_counts.items())
+    assert (sum(o[2] for o in picked), len(picked)) == expected
@@ -0,0 +1,102 @@
+import pytest
+
+from course_graph import CourseGraph
+from data_processor import ScheduleDataProcessor
+from meeting_times import MINUTES_PER_DAY, book, meeting_options, parse_days, parse_time_range
+from schedule_backend import schedule_processed
+
+
+@pytest.mark.parametrize("days,expected", [
+    (["Monday", "Wednesday"], [0, 2]),
+    ("MWF", [0, 2, 4]),
+    (["TTh"], [1, 3]),
+    ("TR", [1, 3]),
+    ("M, W", [0, 2]),
+    (["Tue", "thu", "xyz"], [1, 3]),
+    (None, []),
+])
+def test_parse_days(days, expected):
+    assert parse_days(days) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("09:00-10:30", (540, 630)),
+    ("9-10:15am", (540, 615)),
+    ("1:00 PM - 2:15 PM", (780, 855)),
+    ("11-12:15pm", (660, 735)),
+    ("12:00pm-12:50pm", (720, 770)),
+    ("12:00am-1:00am", (0, 60)),
+    ("14:00 to 15:15", (840, 915)),
+    ("9:00–10:00", (540, 600)),
+    ("10:30-9:00", None),
+    ("25:00-26:00", None),
+    ("TBA", None),
+])
+def test_parse_time_range(text, expected):
+    assert parse_time_range(text) == expected
+
+
+def test_meeting_options_are_alternatives():
+    options = meeting_options(["Monday", "Wednesday"], "09:00-10:30, 14:00-15:30")
+    assert len(options) == 2
+    first = options[0]
+    assert first >> 540 & 1 and first >> (2 * MINUTES_PER_DAY + 629) & 1
+    assert not first >> 630 & 1 and not first >> (MINUTES_PER_DAY + 540) & 1
+    assert meeting_options([], ["9-10"]) == ()
+    assert meeting_options(["M"], []) == ()
+    assert meeting_options(["M"], ["TBA"]) == ()
+
+
+def test_book():
+    monday_nine = meeting_options(["Monday"], ["09:00-10:00"])
+    monday_half_past = meeting_options(["Monday"], ["09:30-10:30"])
+    tuesday_nine = meeting_options(["Tuesday"], ["09:00-10:00"])
+    assert book(0, [monday_nine, monday_half_past]) is None
+    assert book(0, [monday_nine, tuesday_nine]) == monday_nine[0] | tuesday_nine[0]
+    # Back-to-back meetings don't overlap
+    assert book(0, [monday_nine, meeting_options(["Monday"], ["10:00-11:00"])]) is not None
+    # Courses without set times never conflict
+    assert book(monday_nine[0], [(), ()]) == monday_nine[0]
+
+
+def test_book_moves_an_earlier_course_to_another_time():
+    either = meeting_options(["Monday"], ["09:00-10:00", "13:00-14:00"])
+    morning = meeting_options(["Monday"], ["09:00-10:00"])
+    busy = book(0, [either, morning])
+    assert busy == either[1] | morning[0]
+    assert book(0, [either, morning, meeting_options(["Monday"], ["13:30-14:00"])]) is None
+
+
+def _class(cid, days=(), times=(), corequisites=()):
+    return {"id": cid, "class_name": f"C{cid}", "class_number": f"CS {100 + cid}", "credits": 3,
+            "semesters_offered": ["Fall", "Winter", "Spring"], "prerequisites": [],
+            "corequisites": list(corequisites), "days_offered": list(days), "times_offered": list(times),
+            "from_course": "minor"}
+
+
+@pytest.mark.parametrize("approach", ["credits-based", "semester-based"])
+def test_clashing_classes_go_to_different_semesters(approach):
+    classes = [_class(1, ["Monday", "Wednesday"], ["09:00-10:15"]), _class(2, ["Monday"], ["10:00-11:00"]),
+               _class(3, ["Wednesday"], ["9:30-10:30am"]), _class(4, ["Tuesday"], ["09:00-10:00"]), _class(5),
+               _class(6, ["Monday"], ["09:00-10:00", "13:00-14:00"])]
+    processed = ScheduleDataProcessor().process_payload({
+        "classes": classes,
+        "preferences": {"startSemester": "Fall 2025", "approach": approach,
+                        "fallWinterCredits": 18, "springCredits": 18},
+    })
+    graph = CourseGraph.from_processed(processed)
+    schedule = schedule_processed(processed, graph)["schedule"]
+    assert sorted(c["id"] for sem in schedule for c in sem["classes"]) == [1, 2, 3, 4, 5, 6]
+    for sem in schedule:
+        assert book(0, [graph.meetings[graph.index_of(c["id"])] for c in sem["classes"]]) is not None
+
+
+def test_clashing_corequisites_are_diagnosed():
+    processor = ScheduleDataProcessor()
+    classes = [_class(1, ["M"], ["9-10"], corequisites=[2]), _class(2, ["M"], ["9:30-10:30"]), _class(3)]
+    processed = processor.process_payload({
+        "classes": classes,
+        "preferences": {"startSemester": "Fall 2025", "approach": "credits-based"},
+    })
+    problem = processor.diagnose(processed, 18, "clashing-corequisites")
+    assert problem and problem["diagnostics"]["meetingConflicts"]
@@ -0,0 +1,196 @@
+from itertools import combinations
+
+import pytest
+
+import optimal_solver
+from course_graph import CourseGraph
+from data_processor import ScheduleDataProcessor
+from meeting_times import book
+from optimal_solver import OptimalSearch, UnitModel, create_schedule
+from run_credits_simple import build_config
+from schedule_backend import schedule_processed, stream_processed
+from schedule_rules import MajorClassLimit
+from synthetic_catalog import CatalogSpec, generate_payload
+
+# Small credit caps make the greedy leave room the search can win back
+SMALL = dict(fallWinterCredits=6, springCredits=3, majorClassLimit=2)
+MEDIUM = dict(fallWinterCredits=9, springCredits=6, majorClassLimit=2)
+CASES = [(classes, caps, seed) for classes in (8, 10) for caps in (SMALL, MEDIUM) for seed in range(8)]
+
+
+def _processed(classes: int, caps: dict, seed: int, **preferences) -> dict:
+    payload = generate_payload(CatalogSpec(classes=classes, depth=3, coreq_density=0.1, eil_share=0, seed=seed))
+    payload["preferences"].update({"approach": "optimal", "timeBudget": 2, **caps, **preferences})
+    processed = ScheduleDataProcessor().process_payload(payload)
+    assert "error" not in processed
+    return processed
+
+
+def _search(processed: dict, graph: CourseGraph) -> OptimalSearch:
+    params = processed["parameters"]
+    config = build_config(params)
+    major_limit = next(r.limit for r in config.rules if isinstance(r, MajorClassLimit))
+    semesters = config.horizon.build(params["startSemester"], config.caps, 1)
+    model = UnitModel(graph, config.caps, major_limit, {})
+    return OptimalSearch(graph, model, config.caps, major_limit, semesters, {}, float("inf"))
+
+
+def _terms(search: OptimalSearch, schedule: list) -> dict:
+    """Class id -> term index of the semester it is in."""
+    index = {}
+    for t in range(optimal_solver.MAX_TERMS):
+        sem = search.semester(t)
+        index[(sem.type, sem.year)] = t
+    return {c["id"]: index[(sem["type"], sem["year"])] for sem in schedule for c in sem["classes"]}
+
+
+def _fewest_terms(search: OptimalSearch) -> int:
+    """Fewest terms for every unit by trying every subset in every term (no pruning)."""
+    m = search.model
+    everything = frozenset(m.order)
+    frontier = {frozenset()}
+    for t in range(optimal_solver.MAX_TERMS):
+        if everything in frontier:
+            return t
+        bit = search.term_bit(t)
+        cap = search.semester(t).credit_limit
+        reached = set()
+        for placed in frontier:
+            ready = [u for u in m.order if u not in placed and m.terms[u] & bit
+                     and all(p in placed for p in m.prereqs[u])]
+            for size in range(len(ready) + 1):
+                for taken in combinations(ready, size):
+                    if (sum(m.credits[u] for u in taken) <= cap
+                            and sum(m.religion[u] for u in taken) <= 1
+                            and sum(m.majors[u] for u in taken) <= search.major_limit):
+                        reached.add(placed | frozenset(taken))
+        frontier = reached
+    raise AssertionError("no schedule within MAX_TERMS")
+
+
+@pytest.mark.parametrize("classes,caps,seed", CASES)
+def test_never_longer_than_greedy(classes, caps, seed):
+    result = create_schedule(_processed(classes, caps, seed))
+    metadata = result["metadata"]
+    assert metadata["semesterSpan"] <= metadata["greedySemesterSpan"]
+    graph = CourseGraph.from_processed(_processed(classes, caps, seed))
+    terms = _terms(_search(_processed(classes, caps, seed), graph), result["schedule"])
+    assert max(terms.values()) + 1 == metadata["semesterSpan"]
+
+
+@pytest.mark.parametrize("classes,caps,seed", CASES)
+def test_optimal_only_when_proven(classes, caps, seed):
+    processed = _processed(classes, caps, seed)
+    graph = CourseGraph.from_processed(processed)
+    metadata = create_schedule(processed, graph)["metadata"]
+    if metadata["optimal"]:
+        assert metadata["semesterSpan"] == _fewest_terms(_search(processed, graph))
+
+
+def test_greedy_kept_when_search_cannot_prove_it():
+    # The greedy takes a course with its prerequisite in one term; the search
+    # needs two, so it can't beat the greedy and doesn't call it optimal
+    classes = [
+        {"id": 1, "class_name": "A", "class_number": "CS 101", "credits": 3,
+         "semesters_offered": ["Fall", "Winter", "Spring"], "prerequisites": []},
+        {"id": 2, "class_name": "B", "class_number": "CS 102", "credits": 3,
+         "semesters_offered": ["Fall", "Winter", "Spring"], "prerequisites": [1]},
+    ]
+    processed = ScheduleDataProcessor().process_payload({
+        "classes": classes,
+        "preferences": {"startSemester": "Fall 2025", "approach": "optimal", "majorClassLimit": 4,
+                        "fallWinterCredits": 18, "springCredits": 12},
+    })
+    result = create_schedule(processed)
+    assert result["metadata"]["semesterSpan"] == result["metadata"]["greedySemesterSpan"] == 1
+    assert result["metadata"]["optimal"] is False
+    assert [[c["id"] for c in sem["classes"]] for sem in result["schedule"]] == [[1, 2]]
+
+
+@pytest.mark.parametrize("classes,caps,seed", CASES)
+def test_improved_plans_finish_prerequisites_first(classes, caps, seed):
+    processed = _processed(classes, caps, seed)
+    graph = CourseGraph.from_processed(processed)
+    result = create_schedule(processed, graph)
+    if result["metadata"]["semesterSpan"] == result["metadata"]["greedySemesterSpan"]:
+        return
+    terms = _terms(_search(processed, graph), result["schedule"])
+    for cid, t in terms.items():
+        for p in processed["classes"][cid]["prerequisites"]:
+            if p in terms:
+                assert terms[p] < t
+
+
+def test_search_improves_some_small_catalogs():
+    spans = [create_schedule(_processed(*case))["metadata"] for case in CASES]
+    assert any(m["semesterSpan"] < m["greedySemesterSpan"] for m in spans)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A clock that moves 10ms every time the solver reads it, so budgets don't depend on machine speed."""
+    reads = []
+
+    def now():
+        reads.append(None)
+        return 1000.0 + 0.01 * len(reads)
+    monkeypatch.setattr(optimal_solver.time, "time", now)
+    return reads
+
+
+def _budget_stop(metadata: dict, clock: list, budget: float):
+    # The search reads the clock every 256 nodes and stops once the budget has passed
+    reads = round(budget / 0.01) + 1
+    assert len(clock) <= reads + 1
+    assert metadata["searchNodes"] <= 256 * reads
+    assert metadata["optimal"] is False
+    assert metadata["semesterSpan"] <= metadata["greedySemesterSpan"]
+
+
+def test_time_budget_is_respected(clock):
+    processed = _processed(50, dict(fallWinterCredits=18, springCredits=12, majorClassLimit=4), 1,
+                           timeBudget=0.2)
+    metadata = create_schedule(processed)["metadata"]
+    _budget_stop(metadata, clock, 0.2)
+
+
+def test_time_budget_is_capped(monkeypatch, clock):
+    monkeypatch.setattr(optimal_solver, "MAX_TIME_BUDGET", 0.2)
+    processed = _processed(50, dict(fallWinterCredits=18, springCredits=12, majorClassLimit=4), 1,
+                           timeBudget=3600)
+    metadata = create_schedule(processed)["metadata"]
+    assert metadata["timeBudget"] == 0.2
+    _budget_stop(metadata, clock, 0.2)
+
+
+@pytest.mark.parametrize("budget", ["soon", True, 0, -1, "nan", "inf"])
+def test_invalid_time_budget_is_rejected(budget):
+    payload = generate_payload(CatalogSpec(classes=5, seed=0))
+    payload["preferences"].update(approach="optimal", timeBudget=budget)
+    processed = ScheduleDataProcessor().process_payload(payload)
+    assert "timeBudget" in processed["error"]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_semesters_have_no_meeting_clash(seed):
+    slots = ["08:00-08:50", "09:00-09:50", "13:00-14:15"]
+    payload = generate_payload(CatalogSpec(classes=12, depth=3, eil_share=0, seed=seed))
+    for k, cls in enumerate(payload["classes"]):
+        cls["days_offered"] = ["Monday", "Wednesday"] if k % 2 else ["Monday"]
+        cls["times_offered"] = [slots[k % 3]] if k % 4 else slots[:2]
+    payload["preferences"].update(approach="optimal", timeBudget=2, **MEDIUM)
+    processed = ScheduleDataProcessor().process_payload(payload)
+    graph = CourseGraph.from_processed(processed)
+    for sem in create_schedule(processed, graph)["schedule"]:
+        assert book(0, [graph.meetings[graph.index_of(c["id"])] for c in sem["classes"]]) is not None
+
+
+@pytest.mark.parametrize("locked", [{"dropped": [1]}, {"lockedSchedule": [{"type": "Fall", "year": 2025, "classes": []}]}])
+def test_solver_refuses_locked_semesters(locked):
+    # /reschedule returns a 400 for solver approaches; the backend doesn't ignore them either
+    processed = _processed(8, SMALL, 0)
+    processed["parameters"].update(locked)
+    with pytest.raises(ValueError):
+        schedule_processed(processed)
+    with pytest.raises(ValueError):
+        list(stream_processed(processed))
@@ -0,0 +1,69 @@
+import pytest
+from flask import Flask, jsonify
+
+from response_encoder import ResponseEncoder
+
+
+def _course(cid, name, credits):
+    # Keys out of order, as a client may send them in a locked semester
+    return {"semesters_offered": ["Fall", "Spring"], "id": cid, "prerequisites": [], "credits": credits,
+            "class_number": f"X {cid}", "corequisites": [], "class_name": name, "from_course": None}
+
+
+COURSES = {1: _course(1, "Théologie", 3), 2: _course(2, "日本語 I", 2.5), 3: _course(3, "Intro \"Δ\"  ", 0.1 + 0.2),
+           4: _course(4, "Plain", 4)}
+
+
+def _result(layout, **metadata):
+    return {
+        "metadata": {"startSemester": "Fall 2025", "approach": "credits-based", "score": 1 / 3, **metadata},
+        "schedule": [{"year": 2025 + n, "type": "Fall", "totalCredits": sum(COURSES[c]["credits"] for c in ids),
+                      "classes": [COURSES[c] for c in ids]} for n, ids in enumerate(layout)],
+    }
+
+
+def _compact(result):
+    """The ?shape=compact response built as plain data."""
+    return {
+        "metadata": result["metadata"],
+        "schedule": [{**sem, "classes": [c["id"] for c in sem["classes"]]} for sem in result["schedule"]],
+        "classes": {str(c["id"]): c for sem in result["schedule"] for c in sem["classes"]},
+    }
+
+
+@pytest.fixture
+def jsonified():
+    app = Flask(__name__)
+
+    def jsonified(data):
+        with app.app_context():
+            return jsonify(data).get_data(as_text=True)
+    return jsonified
+
+
+@pytest.mark.parametrize("catalog_id", [None, "cat"])
+def test_matches_jsonify(jsonified, catalog_id):
+    encoder = ResponseEncoder()
+    extra = {"timestamp": "2025-01-01 10:00:00.5", "cached": False}
+    result = _result([[1, 2], [3], [], [4]])
+    assert encoder.encode(result, catalog_id, extra=extra) + "\n" == jsonified({**result, **extra})
+    assert encoder.encode(result, catalog_id, compact=True) + "\n" == jsonified(_compact(result))
+
+
+def test_matches_jsonify_from_cached_fragments(jsonified):
+    encoder = ResponseEncoder()
+    encoder.encode(_result([[1, 2, 3, 4]]), "cat")
+    # Every course now comes from the catalog's fragments
+    result = _result([[4], [3, 1], [2]], lockedSemesters=0)
+    assert encoder.encode(result, "cat") + "\n" == jsonified(result)
+    assert encoder.encode(result, "cat", compact=True) + "\n" == jsonified(_compact(result))
+    assert encoder.stats()["hits"] == 2
+
+
+def test_locked_semesters_are_encoded_as_sent(jsonified):
+    encoder = ResponseEncoder()
+    encoder.encode(_result([[1, 2]]), "cat")
+    result = _result([[1], [2]], lockedSemesters=1)
+    # The client's copy of a locked class differs from the catalog's
+    result["schedule"][0]["classes"] = [{**COURSES[1], "class_name": "Edited", "grade": "A"}]
+    assert encoder.encode(result, "cat") + "\n" == jsonified(result)
@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import schedule_backend
+from schedule_backend import ProcessBackend
+from schedule_engine import ScheduleTimeout
+
+
+def _nap(seconds, deadline):
+    # Runs in a pool worker; ignores its deadline like a stuck job would
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(schedule_backend, "POLL_SECONDS", 0.05)
+    backend = ProcessBackend(workers=1, deadline_seconds=0.3, grace_seconds=2.0)
+    backend._call(None, _nap, 0)  # wait for the worker to start
+    yield backend
+    backend.shutdown()
+
+
+def test_queued_job_times_out_without_stopping_the_others(backend):
+    # One worker: the first job runs, two more wait in the pool's call queue
+    # and the fourth is still pending when its deadline passes
+    with ThreadPoolExecutor(4) as pool:
+        calls = []
+        for _ in range(4):
+            calls.append(pool.submit(backend._call, backend.budget(), _nap, 1.0))
+            time.sleep(0.05)
+        with pytest.raises(ScheduleTimeout):
+            calls[3].result()
+        assert [call.result() for call in calls[:3]] == [1.0, 1.0, 1.0]
+    assert backend.cancelled == 1
+    assert backend.restarts == 0
+
+
+def test_running_job_past_its_deadline_restarts_the_pool(backend):
+    backend.grace_seconds = 0.2
+    with pytest.raises(ScheduleTimeout):
+        backend._call(backend.budget(), _nap, 3.0)
+    assert backend.restarts == 1
+    assert backend._call(None, _nap, 0) == 0
@@ -0,0 +1,72 @@
+"""Optional NumPy kernels for large catalogs.
+
+NumPy isn't required. Each function here also has a pure-Python path, used
+when NumPy is missing or the input is smaller than VECTOR_MIN_CLASSES (below
+that, converting to arrays costs more than it saves). Both paths return the
+same values.
+"""
+import os
+from typing import Iterable, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+VECTOR_MIN_CLASSES = int(os.environ.get('SCHEDULER_VECTOR_MIN_CLASSES', 2000))
+
+
+def vectorized(n: int) -> bool:
+    return np is not None and n >= VECTOR_MIN_CLASSES
+
+
+def descending_ranks(columns: List[Sequence[int]]) -> List[int]:
+    """Position of each row when rows are sorted by ``columns``, highest first.
+
+    Columns are compared most significant first; equal rows keep their
+    original order, as a stable ``sorted(..., reverse=True)`` would.
+    """
+    n = len(columns[0]) if columns else 0
+    if vectorized(n):
+        # lexsort takes the most significant key last and sorts ascending
+        order = np.lexsort([-np.asarray(c, dtype=np.int64) for c in reversed(columns)])
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n, dtype=np.int64)
+        return rank.tolist()
+    keys = list(zip(*columns))
+    rank = [0] * n
+    for r, i in enumerate(sorted(range(n), key=keys.__getitem__, reverse=True)):
+        rank[i] = r
+    return rank
+
+
+def mask_bits(values: Sequence[int], mask: int = 0xFF) -> int:
+    """Int bitmask with bit i set where ``values[i] & mask`` is non-zero.
+
+    ``values`` is a bytes-like column (bytearray or array("B")).
+    """
+    n = len(values)
+    if vectorized(n):
+        hits = (np.frombuffer(values, dtype=np.uint8) & mask) != 0
+        return int.from_bytes(np.packbits(hits, bitorder="little").tobytes(), "little")
+    bits = bytearray((n + 7) // 8)
+    for i in range(n):
+        if values[i] & mask:
+            bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+def row_lengths(offsets: Sequence[int]) -> List[int]:
+    """Row sizes of a CSR offsets array."""
+    if vectorized(len(offsets) - 1):
+        return np.diff(np.asarray(offsets, dtype=np.int64)).tolist()
+    return [offsets[i + 1] - offsets[i] for i in range(len(offsets) - 1)]
+
+
+def ready_rows(unmet: Sequence[int], member: Iterable[int]) -> List[int]:
+    """Indices that are members (non-zero) and have no unmet prerequisites."""
+    member = bytes(member)
+    if vectorized(len(member)):
+        hits = (np.asarray(unmet, dtype=np.int64) == 0) & (np.frombuffer(member, dtype=np.uint8) != 0)
+        return np.flatnonzero(hits).tolist()
+    return [i for i in range(len(member)) if member[i] and unmet[i] == 0]